@@ -140,7 +140,8 @@ def cmd_prompt(args: argparse.Namespace) -> int:
             input_csv=args.csv,
             target_column=args.target,
             seed=getattr(args, 'seed', 1337),
-            ratio=getattr(args, 'ratio', 0.8)
+            ratio=getattr(args, 'ratio', 0.8),
+            use_semantic_cache=not getattr(args, 'fresh', False)
         )
 
         # Convert to APL format
@@ -193,7 +194,8 @@ def cmd_gen_plan(args: argparse.Namespace) -> int:
             input_csv=args.csv,
             target_column=args.target,
             seed=args.seed,
-            ratio=args.ratio
+            ratio=args.ratio,
+            use_semantic_cache=not args.fresh
         )
 
         # Convert to APL format
@@ -236,6 +238,7 @@ def main():
     ap_prompt.add_argument("--target", required=True, help="Target column name")
     ap_prompt.add_argument("--seed", type=int, default=1337, help="Random seed")
     ap_prompt.add_argument("--ratio", type=float, default=0.8, help="Train/test split ratio")
+    ap_prompt.add_argument("--fresh", action="store_true", help="always ask the model, even if an equivalent goal's plan is cached")
     ap_prompt.set_defaults(func=cmd_prompt)
 
     # compile command
@@ -259,6 +262,7 @@ def main():
     ap_gen.add_argument("--target", required=True, help="Target column name")
     ap_gen.add_argument("--seed", type=int, default=1337)
     ap_gen.add_argument("--ratio", type=float, default=0.8)
+    ap_gen.add_argument("--fresh", action="store_true", help="always ask the model, even if an equivalent goal's plan is cached")
     ap_gen.add_argument("--out", default="apps/forge/plan.apl.json")
     ap_gen.set_defaults(func=cmd_gen_plan)
 
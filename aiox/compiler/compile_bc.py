@@ -436,6 +436,22 @@ def convert_to_tool_calls(program: List[List[Any]], slots: Dict[str, str], tools
 
     return converted
 
+# ---------- schema validation ----------
+
+# Validators keep their resolved $refs between calls; reuse one per distinct
+# schema instead of rebuilding it for every compile in long-lived processes.
+_VALIDATORS: Dict[str, Draft202012Validator] = {}
+_MAX_VALIDATORS = 8
+
+def schema_validator(schema: Dict[str, Any]) -> Draft202012Validator:
+    key = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    v = _VALIDATORS.get(key)
+    if v is None:
+        if len(_VALIDATORS) >= _MAX_VALIDATORS:
+            _VALIDATORS.clear()
+        v = _VALIDATORS[key] = Draft202012Validator(schema)
+    return v
+
 # ---------- main ----------
 
 def compile_plan_file(plan_path: Path, out_path: Path = None, schema_path: Path = None, use_tools: bool = False, tools_root: Path = None):
@@ -460,7 +476,7 @@ def compile_plan_file(plan_path: Path, out_path: Path = None, schema_path: Path
         print(f"[compiler] Using static schema from {schema_path}")
 
     # schema validation
-    Draft202012Validator(schema).validate(plan)
+    schema_validator(schema).validate(plan)
 
     program, slots = lower_steps(plan, use_tools=use_tools)
 
@@ -194,6 +194,7 @@ class MCPToolRegistry(ToolRegistry):
             except Exception as e:
                 logger.error(f"Failed to register MCP tool {tool_data.get('name', 'unknown')}: {e}")
 
+        self._invalidate_caches()
         return count
 
     async def call_mcp_tool(self, tool_name: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
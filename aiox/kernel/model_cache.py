@@ -2,12 +2,34 @@
 from __future__ import annotations
 import json
 import hashlib
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
+# Canonical encoding for cache keys; built once instead of per json.dumps call.
+# Keys name the files under cache/model, so this output must never change.
+_KEY_JSON = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+
+
+def compute_cache_key(model: str, inputs: Dict[str, Any]) -> str:
+    """Compute deterministic hash for model call inputs"""
+    # Sort inputs for consistent hashing
+    h = hashlib.sha256(model.encode('utf-8'))
+    h.update(b':')
+    h.update(_KEY_JSON.encode(inputs).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _report_write(future: Future):
+    # background cache writes have no caller to raise into
+    e = future.exception()
+    if e is not None:
+        print(f"[cache] Failed to store model call: {e}")
+
 
 @dataclass
 class ModelCall:
@@ -33,6 +55,13 @@ class ModelCallCache:
         self.call_log = self.sandbox_root / "logs" / "model_calls.jsonl"
         self.call_log.parent.mkdir(parents=True, exist_ok=True)
 
+        # store_result_later runs on one worker, so writes keep call order;
+        # reads wait for the last one. Pending writes are drained at
+        # interpreter exit by concurrent.futures.
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[Future] = None
+        self._writer_lock = threading.Lock()
+
         # Cost/emission estimates (rough approximations)
         self.cost_per_token = {
             "claude-3-5-sonnet-20241022": {"input": 3.0e-6, "output": 15.0e-6},  # $3/$15 per 1M tokens
@@ -49,10 +78,7 @@ class ModelCallCache:
 
     def _compute_cache_key(self, model: str, inputs: Dict[str, Any]) -> str:
         """Compute deterministic hash for model call inputs"""
-        # Sort inputs for consistent hashing
-        normalized = json.dumps(inputs, sort_keys=True, separators=(',', ':'))
-        content = f"{model}:{normalized}"
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        return compute_cache_key(model, inputs)
 
     def _get_cache_path(self, cache_key: str) -> Path:
         """Get cache file path for a given key"""
@@ -81,6 +107,7 @@ class ModelCallCache:
 
     def get_cached_result(self, model: str, inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Check if result exists in cache"""
+        self.flush_writes()
         cache_key = self._compute_cache_key(model, inputs)
         cache_path = self._get_cache_path(cache_key)
 
@@ -159,8 +186,26 @@ class ModelCallCache:
         with open(self.call_log, 'a', encoding='utf-8') as f:
             f.write(json.dumps(asdict(call_record)) + '\n')
 
+    def store_result_later(self, model: str, inputs: Dict[str, Any], outputs: Dict[str, Any],
+                           latency_ms: float, actual_tokens: Optional[Dict[str, int]] = None) -> Future:
+        """store_result on a background worker; reads from this cache wait for it"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1)
+            future = self._pending = self._writer.submit(
+                self.store_result, model, inputs, outputs, latency_ms, actual_tokens)
+        future.add_done_callback(_report_write)
+        return future
+
+    def flush_writes(self):
+        """Wait until every store_result_later write has finished"""
+        pending = self._pending
+        if pending is not None:
+            wait([pending])
+
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        self.flush_writes()
         cache_files = list(self.cache_root.rglob("*.json"))
         total_cached = len(cache_files)
 
@@ -204,6 +249,7 @@ class ModelCallCache:
 
     def verify_replay_deterministic(self, expected_calls: list) -> Tuple[bool, list]:
         """Verify that replay uses only cached results"""
+        self.flush_writes()
         issues = []
 
         for call in expected_calls:
@@ -225,6 +271,7 @@ class ModelCallCache:
 
     def clear_cache(self):
         """Clear all cached model calls"""
+        self.flush_writes()
         import shutil
         if self.cache_root.exists():
             shutil.rmtree(self.cache_root)
@@ -3,15 +3,47 @@ from __future__ import annotations
 import json
 from pathlib import Path
 from typing import Dict, Any, List, Tuple, Optional
+from dataclasses import dataclass
+from weakref import WeakValueDictionary
 from .model_cache import ModelCallCache
 
+# Run logs larger than this are refused before reading (malformed or runaway logs)
+MAX_RUN_LOG_BYTES = 16 * 1024 * 1024
+
+# One ModelCallCache per sandbox, shared by every live ReplayGate on it
+_cache_registry: "WeakValueDictionary[Path, ModelCallCache]" = WeakValueDictionary()
+
+
+def _shared_cache(sandbox_root: Path) -> ModelCallCache:
+    key = sandbox_root.resolve()
+    cache = _cache_registry.get(key)
+    if cache is None:
+        cache = ModelCallCache(sandbox_root)
+        _cache_registry[key] = cache
+    return cache
+
+
+@dataclass(frozen=True)
+class ExpectedCall:
+    """A model call recorded for replay verification"""
+    __slots__ = ("model", "inputs", "outputs")
+    model: Optional[str]
+    inputs: Dict[str, Any]
+    outputs: Any
+
+    @classmethod
+    def from_record(cls, rec: Dict[str, Any]) -> "ExpectedCall":
+        return cls(rec.get("model"), rec.get("inputs", {}), rec.get("expected_outputs"))
+
 
 class ReplayGate:
     """Enforce deterministic replay by ensuring all model calls hit cache"""
 
+    __slots__ = ("sandbox_root", "cache", "replay_mode", "expected_calls", "actual_calls")
+
     def __init__(self, sandbox_root: Path):
         self.sandbox_root = Path(sandbox_root)
-        self.cache = ModelCallCache(sandbox_root)
+        self.cache = _shared_cache(self.sandbox_root)
         self.replay_mode = False
         self.expected_calls = []
         self.actual_calls = []
@@ -19,7 +51,7 @@ class ReplayGate:
     def enable_replay_mode(self, expected_model_calls: List[Dict[str, Any]]):
         """Enable replay mode with expected model calls"""
         self.replay_mode = True
-        self.expected_calls = expected_model_calls
+        self.expected_calls = [ExpectedCall.from_record(c) for c in expected_model_calls]
         self.actual_calls = []
         print(f"[replay] Enabled replay mode with {len(expected_model_calls)} expected model calls")
 
@@ -59,8 +91,11 @@ class ReplayGate:
 
         return True, cached_result
 
-    def verify_replay_completeness(self) -> Tuple[bool, List[str]]:
-        """Verify that replay matched all expected calls"""
+    def verify_replay_completeness(self, fail_fast: bool = False) -> Tuple[bool, List[str]]:
+        """Verify that replay matched all expected calls
+
+        With fail_fast, return as soon as the first issue is found.
+        """
         if not self.replay_mode:
             return True, []
 
@@ -69,23 +104,31 @@ class ReplayGate:
         # Check if we made the expected number of calls
         if len(self.actual_calls) != len(self.expected_calls):
             issues.append(f"Call count mismatch: expected {len(self.expected_calls)}, got {len(self.actual_calls)}")
+            if fail_fast:
+                return False, issues
 
         # Verify each call matched expectations
         for i, expected in enumerate(self.expected_calls):
             if i >= len(self.actual_calls):
-                issues.append(f"Missing call {i+1}: {expected.get('model', 'unknown')}")
-                continue
+                issues.append(f"Missing call {i+1}: {expected.model or 'unknown'}")
+            else:
+                actual = self.actual_calls[i]
 
-            actual = self.actual_calls[i]
+                # Verify model matches
+                if actual.get('model') != expected.model:
+                    issues.append(f"Call {i+1} model mismatch: expected {expected.model}, got {actual.get('model')}")
 
-            # Verify model matches
-            if actual.get('model') != expected.get('model'):
-                issues.append(f"Call {i+1} model mismatch: expected {expected.get('model')}, got {actual.get('model')}")
+                # Note: We don't strictly verify inputs/outputs during replay since cache lookup handles that
 
-            # Note: We don't strictly verify inputs/outputs during replay since cache lookup handles that
+            if fail_fast and issues:
+                return False, issues
 
         return len(issues) == 0, issues
 
+    def is_replay_valid(self) -> bool:
+        """Quick pass/fail check of the replay (stops at first mismatch)"""
+        return self.verify_replay_completeness(fail_fast=True)[0]
+
     def get_replay_summary(self) -> Dict[str, Any]:
         """Get summary of replay verification"""
         if not self.replay_mode:
@@ -143,17 +186,24 @@ class ReplayGate:
             return False
 
         try:
-            run_data = json.loads(run_log_path.read_text(encoding='utf-8'))
-            model_calls = run_data.get("model_calls", [])
-
-            if not model_calls:
-                print("[replay] No model calls found in run log")
+            size = run_log_path.stat().st_size
+            if size > MAX_RUN_LOG_BYTES:
+                print(f"[replay] Run log too large ({size} bytes > {MAX_RUN_LOG_BYTES}), refusing to load")
                 return False
+            run_data = json.loads(run_log_path.read_bytes())
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError) as e:
+            print(f"[replay] Failed to load run log: {e}")
+            return False
+        if not isinstance(run_data, dict):
+            print(f"[replay] Malformed run log: expected an object, got {type(run_data).__name__}")
+            return False
 
-            self.enable_replay_mode(model_calls)
-            print(f"[replay] Loaded {len(model_calls)} model calls from previous run")
-            return True
+        model_calls = run_data.get("model_calls", [])
 
-        except Exception as e:
-            print(f"[replay] Failed to load run log: {e}")
-            return False
\ No newline at end of file
+        if not model_calls:
+            print("[replay] No model calls found in run log")
+            return False
+
+        self.enable_replay_mode(model_calls)
+        print(f"[replay] Loaded {len(model_calls)} model calls from previous run")
+        return True
\ No newline at end of file
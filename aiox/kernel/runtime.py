@@ -1,15 +1,28 @@
 # kernel/runtime.py
 from __future__ import annotations
-import csv, json, math, os, sys, time, hashlib, zipfile, subprocess, shutil
+import atexit, csv, json, logging, math, mmap, os, sys, time, hashlib, zipfile, subprocess, shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+from itertools import compress, repeat, zip_longest
+from operator import mul
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Tuple
 from .tools import ToolRegistry
 
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used instead
+    orjson = None
+
 # --- persistent policy (grant-once) ---
 class PolicyStore:
     def __init__(self, path: Path):
         self.path = path
         self.data = {"grants": {}, "limits": {}}  # limits used by quotas (Part B)
+        self._dirty = False
         if path.exists():
             try:
                 self.data = json.loads(path.read_text(encoding="utf-8"))
@@ -18,21 +31,41 @@ class PolicyStore:
 
     def save(self):
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.path.write_text(json.dumps(self.data, indent=2), encoding="utf-8")
+        if orjson is not None:
+            payload = orjson.dumps(self.data, option=orjson.OPT_INDENT_2)
+        else:
+            payload = json.dumps(self.data, indent=2).encode("utf-8")
+        # write-then-rename so a crash never leaves a truncated policy.json
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, self.path)
+        self._dirty = False
+        atexit.unregister(self.flush)
+
+    def flush(self):
+        """Persist pending grants/limits (no-op when nothing changed)"""
+        if self._dirty:
+            self.save()
+
+    def _mark_dirty(self):
+        if not self._dirty:
+            self._dirty = True
+            # safety net for stores that are never flushed explicitly
+            atexit.register(self.flush)
 
     def is_granted(self, app_id: str, cap: str) -> bool:
         return bool(self.data.get("grants", {}).get(app_id, {}).get(cap))
 
     def grant(self, app_id: str, cap: str):
         self.data.setdefault("grants", {}).setdefault(app_id, {})[cap] = True
-        self.save()
+        self._mark_dirty()
 
     def get_limits(self) -> dict:
         return dict(self.data.get("limits", {}))
 
     def set_limits(self, **kwargs):
         self.data.setdefault("limits", {}).update(kwargs)
-        self.save()
+        self._mark_dirty()
 
 # --- quotas tracking ---
 class Quotas:
@@ -74,32 +107,183 @@ class Quotas:
 
 # ---------- helpers: sandbox + hashing + logging ----------
 
+# app ids key persisted grants, so the encoding must stay byte-identical to
+# json.dumps(..., separators=(",", ":")); reuse one encoder instead of building
+# a new one (plus the circular-reference walk) on every VM start or tx record
+_COMPACT_JSON = json.JSONEncoder(separators=(",", ":"), check_circular=False)
+
+# artifact JSON (model, schema, tool outputs) is checksummed by replay, so it
+# stays on the stdlib encoder: orjson formats floats differently (1e-05 vs 0.00001)
+_ARTIFACT_JSON = json.JSONEncoder(indent=2, sort_keys=True, separators=(',', ': '), ensure_ascii=True)
+
+# report metric line templates by exact type; bool is an int and formats as one
+_METRIC_NUM = "- **{}**: {:.6f}"
+_METRIC_FMT = {int: _METRIC_NUM, float: _METRIC_NUM, bool: _METRIC_NUM, str: "- **{}**: {}"}
+
+def _metric_fmt(v: Any) -> str:
+    fmt = _METRIC_FMT.get(type(v))
+    if fmt is None:  # subclasses such as numpy floats
+        fmt = _METRIC_NUM if isinstance(v, (int, float)) else "- **{}**: {}"
+    return fmt
+
+def program_app_id(program: Any) -> str:
+    return hashlib.sha256(_COMPACT_JSON.encode(program).encode()).hexdigest()[:12]
+
 def sha256_file(p: Path) -> str:
     h = hashlib.sha256()
     with p.open("rb") as f:
-        for chunk in iter(lambda: f.read(1 << 20), b""):
-            h.update(chunk)
+        if os.fstat(f.fileno()).st_size > (1 << 20):
+            # hash large files straight from the page cache, without read() copies
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        else:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
     return h.hexdigest()
 
+# out/ hashes are cached only for files last modified at least this long before the
+# scan: mtime ticks can be coarse (2 s on FAT), hiding a same-size rewrite
+HASH_CACHE_SETTLE_NS = 2 * 10**9
+
+# _zip_dir reads files up to this size ahead on worker threads, a batch at a time
+ZIP_PREFETCH_BYTES = 1 << 20
+ZIP_PREFETCH_BATCH = 32
+
+def _scan_files(root: str) -> List[Tuple[str, str, int]]:
+    # (arcname, full path, size) for every file under root, like os.walk's file lists:
+    # symlinks to directories are neither followed nor listed
+    out: List[Tuple[str, str, int]] = []
+    stack = [(root, "")]
+    while stack:
+        d, prefix = stack.pop()
+        with os.scandir(d) as it:
+            for e in it:
+                arc = prefix + e.name
+                if e.is_dir():
+                    if not e.is_symlink():
+                        stack.append((e.path, arc + os.sep))
+                else:
+                    out.append((arc, e.path, e.stat().st_size))
+    out.sort()
+    return out
+
+def _read_for_zip(item: Tuple[str, str, int]) -> Any:
+    _, path, size = item
+    if size > ZIP_PREFETCH_BYTES:
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+@lru_cache(maxsize=1 << 17)
+def _parse_cell(xs: str) -> Any:
+    # CSV cells repeat heavily (codes, flags, small ints): parse each distinct value once
+    try:
+        if "." in xs or "e" in xs or "E" in xs:
+            return float(xs)
+        return int(xs)
+    except ValueError:
+        return xs
+
+@lru_cache(maxsize=32)
+def _resolved_root(root: Path) -> str:
+    # the sandbox root does not move during a run; resolve it once
+    return str(root.resolve())
+
 def ensure_under(root: Path, p: Path) -> Path:
     p = p.resolve()
-    if not str(p).startswith(str(root.resolve())):
+    r = _resolved_root(root)
+    ps = str(p)
+    # match whole path components so /sbx does not admit /sbx-evil
+    if ps != r and not ps.startswith(r.rstrip(os.sep) + os.sep):
         raise PermissionError(f"Path escapes sandbox: {p} (root={root})")
     return p
 
 class TxLogger:
+    # records are buffered and appended in one write; bound the buffer for long runs
+    FLUSH_EVERY = 256
+
     def __init__(self, log_path: Path, dry_run: bool, run_id: str):
         self.log_path = log_path
         self.log_path.parent.mkdir(parents=True, exist_ok=True)
         self.dry_run = dry_run
         self.run_id = run_id
+        self._buf: List[bytes] = []
 
     def write(self, rec: Dict[str, Any]):
         rec["ts"] = time.time()
         rec["dry_run"] = self.dry_run
         rec["run_id"] = self.run_id
-        with self.log_path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(rec) + "\n")
+        # stays on the stdlib encoder: orjson writes NaN and +/-inf as null, and
+        # ASSERT_GE logs -inf for a missing field
+        self._buf.append(_COMPACT_JSON.encode(rec).encode("utf-8") + b"\n")
+        if len(self._buf) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if not self._buf:
+            return
+        with self.log_path.open("ab") as f:
+            f.write(b"".join(self._buf))
+        self._buf.clear()
+
+# ---------- predict worker ----------
+
+# Runs an app's predict.py in-process for each request, so one interpreter
+# serves every VERIFY_CLI call of a run instead of one per call.
+_PREDICT_DRIVER = """\
+import sys, os, io, json, runpy, contextlib, traceback
+out = sys.stdout
+for line in sys.stdin:
+    req = json.loads(line)
+    so, se = io.StringIO(), io.StringIO()
+    rc = 0
+    try:
+        os.chdir(req['cwd'])
+        sys.argv = ['predict.py', '--input', req['input']]
+        with contextlib.redirect_stdout(so), contextlib.redirect_stderr(se):
+            runpy.run_path('predict.py', run_name='__main__')
+    except SystemExit as e:
+        if isinstance(e.code, int) or e.code is None:
+            rc = e.code or 0
+        else:
+            se.write(str(e.code) + '\\n'); rc = 1
+    except BaseException:
+        traceback.print_exc(file=se); rc = 1
+    out.write(json.dumps({'rc': rc, 'stdout': so.getvalue(), 'stderr': se.getvalue()}) + '\\n')
+    out.flush()
+"""
+
+class PredictWorker:
+    """Long-lived interpreter that executes predict.py on request."""
+
+    def __init__(self):
+        self.proc = subprocess.Popen([sys.executable, "-c", _PREDICT_DRIVER],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, text=True, encoding="utf-8")
+        self._reader = ThreadPoolExecutor(max_workers=1)
+
+    def run(self, app_dir: Path, sample: Path, timeout: float) -> Tuple[int, str, str]:
+        self.proc.stdin.write(json.dumps({"cwd": str(app_dir), "input": str(sample)}) + "\n")
+        self.proc.stdin.flush()
+        try:
+            line = self._reader.submit(self.proc.stdout.readline).result(timeout=timeout)
+        except FutureTimeout:
+            self.close()
+            raise subprocess.TimeoutExpired("predict.py", timeout)
+        if not line:
+            raise BrokenPipeError("predict worker exited")
+        res = json.loads(line)
+        return res["rc"], res["stdout"], res["stderr"]
+
+    def close(self):
+        if self.proc.poll() is None:
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.proc.kill()
+                self.proc.wait()
+        self._reader.shutdown(wait=False)
 
 # ---------- capability policy ----------
 
@@ -140,8 +324,7 @@ class VM:
         self.prog: List[List[Any]] = bytecode["program"]
 
         # stable app id = hash of program
-        prog_bytes = json.dumps(self.bc.get("program", []), separators=(",", ":")).encode()
-        self.app_id = hashlib.sha256(prog_bytes).hexdigest()[:12]
+        self.app_id = program_app_id(self.bc.get("program", []))
 
         # persistent policy store in sandbox
         self.policy = PolicyStore(self.sbx / "policy.json")
@@ -151,7 +334,7 @@ class VM:
 
         # Initialize tool registry
         tools_root = self.sbx.parent / "tools"
-        self.tools = ToolRegistry(tools_root)
+        self.tools = ToolRegistry(tools_root, cache_path=self.sbx / "cache" / "tools.json")
         self.tools.discover_tools()
 
         self.run_id = f"run-{int(time.time()*1000)}"
@@ -159,6 +342,30 @@ class VM:
         self.dry = dry_run
         # minimal process table (single plan process for v1)
         self.proc = {"pid": 1, "state": "READY", "pc": 0, "name": "plan"}
+        # started on the first VERIFY_CLI and reused for the rest of the run
+        self._predictor: PredictWorker | None = None
+
+        # opcode -> handler dispatch table
+        self._ops = {
+            "CALL_TOOL": self._op_call_tool,
+            "READ_CSV": self._op_read_csv,
+            "PROFILE": self._op_profile,
+            "SPLIT": self._op_split,
+            "TRAIN_LR": self._op_train_lr,
+            "EVAL": self._op_eval,
+            "ASSERT_GE": self._op_assert_ge,
+            "EMIT_REPORT": self._op_emit_report,
+            "BUILD_CLI": self._op_build_cli,
+            "ZIP": self._op_zip,
+            "VERIFY_ZIP": self._op_verify_zip,
+            "VERIFY_CLI": self._op_verify_cli,
+        }
+
+        # per-opcode trace goes to stderr only when AIOX_VM_DEBUG is set
+        self._debug = bool(os.environ.get("AIOX_VM_DEBUG"))
+        if self._debug and not logger.handlers:
+            logger.addHandler(logging.StreamHandler(sys.stderr))
+            logger.setLevel(logging.DEBUG)
 
         # Check compilation mode
         self.use_tools = bytecode.get("metadata", {}).get("compilation_mode") == "tools"
@@ -171,14 +378,18 @@ class VM:
         self.caps.require("fs.read")
         p = ensure_under(self.sbx, Path(path))
         # charge for file IO
-        file_size = p.stat().st_size if p.exists() else 0
-        self.quotas.charge("io_bytes", file_size)
+        self.quotas.charge("io_bytes", p.stat().st_size)
 
-        with p.open("r", encoding="utf-8") as f:
+        # coerce while reading so the raw string rows are never held in full
+        with p.open("r", encoding="utf-8", newline="") as f:
             rdr = csv.reader(f)
-            rows = list(rdr)
-        header = rows[0]
-        body = [self._coerce_row(header, r) for r in rows[1:]]
+            header = next(rdr, None)
+            if header is None:
+                raise ValueError(f"CSV file is empty: {p}")
+            coerce = self._coerce_row
+            body = [coerce(header, r) for r in rdr]
+        # the cell cache only pays off within one file; release it
+        _parse_cell.cache_clear()
         self.tx.write({"op":"READ_CSV", "path": str(p), "rows": len(body)})
         return header, body
 
@@ -187,16 +398,12 @@ class VM:
         p = ensure_under(self.sbx, Path(path))
         pre_exists = p.exists()
         # charge for file IO and file creation
-        text_bytes = len(text.encode('utf-8'))
-        self.quotas.charge("io_bytes", text_bytes)
+        data = text.encode('utf-8')
+        self.quotas.charge("io_bytes", len(data))
         if not pre_exists:
             self.quotas.charge("files_written", 1)
 
-        if not self.dry:
-            p.parent.mkdir(parents=True, exist_ok=True)
-            p.write_text(text, encoding="utf-8")
-        post_hash = sha256_file(p) if (not self.dry) else None
-        self.tx.write({"op":"WRITE_FILE", "path": str(p), "pre_exists": pre_exists, "created": (not pre_exists), "hash": post_hash})
+        self._write_bytes("WRITE_FILE", p, pre_exists, data)
 
     def _fs_write_json(self, path: str, obj: Any):
         self.caps.require("fs.write")
@@ -204,17 +411,32 @@ class VM:
         pre_exists = p.exists()
         # charge for JSON serialization and file IO
         # Use deterministic JSON serialization (sorted keys, consistent float format)
-        json_text = json.dumps(obj, indent=2, sort_keys=True, separators=(',', ': '), ensure_ascii=True)
-        json_bytes = len(json_text.encode('utf-8'))
-        self.quotas.charge("io_bytes", json_bytes)
+        data = _ARTIFACT_JSON.encode(obj).encode('utf-8')
+        self.quotas.charge("io_bytes", len(data))
         if not pre_exists:
             self.quotas.charge("files_written", 1)
 
+        self._write_bytes("WRITE_JSON", p, pre_exists, data)
+
+    def _write_bytes(self, op: str, p: Path, pre_exists: bool, data: bytes):
+        """Write data to p unless it already holds exactly these bytes, then log op"""
+        post_hash = None
+        skipped = False
         if not self.dry:
-            p.parent.mkdir(parents=True, exist_ok=True)
-            p.write_text(json_text, encoding="utf-8")
-        post_hash = sha256_file(p) if (not self.dry) else None
-        self.tx.write({"op":"WRITE_JSON", "path": str(p), "pre_exists": pre_exists, "created": (not pre_exists), "hash": post_hash})
+            # hash the bytes in memory instead of reading the file back
+            post_hash = hashlib.sha256(data).hexdigest()
+            skipped = (pre_exists and p.is_file() and p.stat().st_size == len(data)
+                       and sha256_file(p) == post_hash)
+            if not skipped:
+                p.parent.mkdir(parents=True, exist_ok=True)
+                # write-then-rename so readers never see a half-written file
+                tmp = p.with_name(p.name + ".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, p)
+        rec = {"op": op, "path": str(p), "pre_exists": pre_exists, "created": (not pre_exists), "hash": post_hash}
+        if skipped:
+            rec["skipped"] = True
+        self.tx.write(rec)
 
     def _fs_mkdir(self, path: str):
         self.caps.require("fs.write")
@@ -231,27 +453,28 @@ class VM:
         pre_exists = dest.exists()
         if not self.dry:
             with zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_DEFLATED) as z:
-                # Collect all files first and sort for deterministic ordering
-                all_files = []
-                for root, _, files in os.walk(src):
-                    for fn in sorted(files):  # Sort filenames within each directory
-                        fp = Path(root) / fn
-                        all_files.append(fp)
-
-                # Sort all files by their relative path for consistent ordering
-                all_files.sort(key=lambda p: str(p.relative_to(src)))
-
-                # Add files to zip with deterministic timestamps
-                for fp in all_files:
-                    arcname = str(fp.relative_to(src))
-                    # Create ZipInfo with fixed timestamp for determinism
-                    zinfo = zipfile.ZipInfo(filename=arcname)
-                    zinfo.date_time = (2023, 1, 1, 0, 0, 0)  # Fixed timestamp
-                    zinfo.compress_type = zipfile.ZIP_DEFLATED
-
-                    # Read file content and add to zip
-                    with open(fp, 'rb') as f:
-                        z.writestr(zinfo, f.read())
+                # One scandir pass, sorted by archive name for deterministic ordering
+                all_files = _scan_files(str(src))
+
+                # Add files to zip with deterministic timestamps. Small files are read
+                # ahead in parallel; entries are still written in order on this thread.
+                with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as ex:
+                    for start in range(0, len(all_files), ZIP_PREFETCH_BATCH):
+                        batch = all_files[start:start + ZIP_PREFETCH_BATCH]
+                        for (arcname, fp, size), data in zip(batch, ex.map(_read_for_zip, batch)):
+                            # Create ZipInfo with fixed timestamp for determinism
+                            zinfo = zipfile.ZipInfo(filename=arcname)
+                            zinfo.date_time = (2023, 1, 1, 0, 0, 0)  # Fixed timestamp
+                            zinfo.compress_type = zipfile.ZIP_DEFLATED
+
+                            if data is not None:
+                                z.writestr(zinfo, data)
+                                continue
+                            # size up front, as writestr would, so zip64 is chosen identically
+                            zinfo.file_size = size
+                            # Stream large files into the zip in bounded chunks
+                            with open(fp, 'rb') as f, z.open(zinfo, 'w') as zf:
+                                shutil.copyfileobj(f, zf, 1 << 20)
         post_hash = sha256_file(dest) if (not self.dry) else None
         self.tx.write({"op":"ZIP", "src": str(src), "dest": str(dest), "pre_exists": pre_exists, "created": (not pre_exists), "hash": post_hash})
 
@@ -275,14 +498,22 @@ class VM:
             return 0.0
         # run predict.py and track CPU time
         start_time = time.time()
-        cmd = [sys.executable, "predict.py", "--input", str(sin)]
-        proc = subprocess.run(cmd, cwd=str(adir), capture_output=True, text=True, timeout=10)
+        try:
+            if self._predictor is None:
+                self._predictor = PredictWorker()
+            rc, stdout, stderr = self._predictor.run(adir, sin, timeout=10)
+        except (OSError, ValueError):
+            # worker unavailable or its pipe broke: fall back to a one-shot process
+            self._close_predictor()
+            cmd = [sys.executable, "predict.py", "--input", str(sin)]
+            proc = subprocess.run(cmd, cwd=str(adir), capture_output=True, text=True, timeout=10)
+            rc, stdout, stderr = proc.returncode, proc.stdout, proc.stderr
         cpu_ms = int((time.time() - start_time) * 1000)
         self.quotas.charge("cpu_ms", cpu_ms)
-        if proc.returncode != 0:
-            self.tx.write({"op":"VERIFY_CLI", "ok": False, "stderr": proc.stderr})
-            raise RuntimeError(f"predict.py failed: {proc.stderr}")
-        out = proc.stdout.strip()
+        if rc != 0:
+            self.tx.write({"op":"VERIFY_CLI", "ok": False, "stderr": stderr})
+            raise RuntimeError(f"predict.py failed: {stderr}")
+        out = stdout.strip()
         try:
             val = float(out)
         except ValueError:
@@ -292,36 +523,46 @@ class VM:
         self.tx.write({"op":"VERIFY_CLI", "ok": True, "prediction": val})
         return val
 
+    def _close_predictor(self):
+        if self._predictor is not None:
+            self._predictor.close()
+            self._predictor = None
+
     # ----- data transforms -----
 
     @staticmethod
     def _coerce_row(header: List[str], r: List[str]) -> List[Any]:
-        out: List[Any] = []
-        for x in r:
-            xs = x.strip()
-            if xs == "":
-                out.append(None)
-            else:
-                try:
-                    if "." in xs or "e" in xs or "E" in xs:
-                        out.append(float(xs))
-                    else:
-                        out.append(int(xs))
-                except ValueError:
-                    out.append(xs)
-        return out
+        return [None if (xs := x.strip()) == "" else _parse_cell(xs) for x in r]
+
+    @staticmethod
+    def _columns(header: List[str], rows: List[List[Any]]) -> List[Tuple[Any, ...]]:
+        """Column-major (SoA) view of a row table; short rows are padded with None"""
+        ncols = len(header)
+        cols = list(zip_longest(*rows))[:ncols]
+        cols.extend([(None,) * len(rows)] * (ncols - len(cols)))
+        return cols
+
+    @staticmethod
+    def _split_mask(n: int, ratio: float, seed: int) -> List[bool]:
+        """Train/val membership per row index: first MD5 byte of "<i>:<seed>" against ratio"""
+        # only 256 possible bytes, so decide each one once
+        to_train = [(h / 255.0) < ratio for h in range(256)]
+        md5 = hashlib.md5
+        suffix = b":%d" % seed
+        return [to_train[md5(b"%d%s" % (i, suffix)).digest()[0]] for i in range(n)]
 
     @staticmethod
     def _profile(header: List[str], rows: List[List[Any]]) -> Dict[str, Any]:
         cols = []
         n = len(rows)
-        for j, name in enumerate(header):
-            col = [row[j] for row in rows]
-            nonnull = [x for x in col if x is not None]
-            dtype = "string"
-            if all((isinstance(x, (int, float)) or x is None) for x in col) and any(isinstance(x, (int,float)) for x in col):
-                dtype = "number"
-            miss = (n - len(nonnull)) / max(1, n)
+        numeric = repeat((int, float))
+        for name, col in zip(header, VM._columns(header, rows)):
+            # one counting pass per column (both run at C level)
+            nonnull = n - col.count(None)
+            num = sum(map(isinstance, col, numeric))
+            # number = every non-null value is numeric, and there is at least one
+            dtype = "number" if 0 < num == nonnull else "string"
+            miss = (n - nonnull) / max(1, n)
             cols.append({"name": name, "dtype": dtype, "missing": miss})
         return {"rows": n, "cols": cols}
 
@@ -334,6 +575,26 @@ class VM:
         t = idx[target]
         feat_names = [h for h in header if h != target]
         feat_idx = [idx[h] for h in feat_names]
+
+        # One solver everywhere: model.npz and the report are checksummed on replay,
+        # so their bytes must not depend on which optional libraries are installed
+        w, means = self._fit_lstsq(rows, t, feat_idx)
+
+        # Round coefficients to ensure deterministic serialization (avoid floating-point precision issues)
+        model = {
+            "features": feat_names,
+            "coef": [round(float(c), 12) for c in w[1:]],  # exclude bias term, round to 12 decimals
+            "intercept": round(float(w[0]), 12),
+            "impute": [round(float(m), 12) for m in means],
+            "target_column": target  # Store target column for evaluation
+        }
+        # charge for training time
+        cpu_ms = int((time.time() - start_time) * 1000)
+        self.quotas.charge("cpu_ms", cpu_ms)
+        return model
+
+    @staticmethod
+    def _fit_lstsq(rows: List[List[Any]], t: int, feat_idx: List[int]) -> Tuple[List[float], List[float]]:
         # collect numeric features only; drop rows with non-numeric target
         X_list, y_list = [], []
         # compute means for impute
@@ -364,18 +625,16 @@ class VM:
         # add bias column (ones)
         Xb = [[1.0] + row for row in X_list]
 
-        # X'X calculation
+        # X'X calculation: dot products of column pairs, upper triangle mirrored
+        cols = [list(c) for c in zip(*Xb)]
         XtX = [[0.0] * (p+1) for _ in range(p+1)]
         for i in range(p+1):
-            for j in range(p+1):
-                for row in Xb:
-                    XtX[i][j] += row[i] * row[j]
+            ci = cols[i]
+            for j in range(i, p+1):
+                XtX[i][j] = XtX[j][i] = sum(map(mul, ci, cols[j]))
 
         # X'y calculation
-        Xty = [0.0] * (p+1)
-        for i in range(p+1):
-            for k, row in enumerate(Xb):
-                Xty[i] += row[i] * y_list[k]
+        Xty = [sum(map(mul, c, y_list)) for c in cols]
 
         # Simple matrix inversion for small matrices (Gaussian elimination)
         # Add small ridge regularization for stability
@@ -414,18 +673,7 @@ class VM:
             if A[i][i] != 0:
                 w[i] /= A[i][i]
 
-        # Round coefficients to ensure deterministic serialization (avoid floating-point precision issues)
-        model = {
-            "features": feat_names,
-            "coef": [round(float(c), 12) for c in w[1:]],  # exclude bias term, round to 12 decimals
-            "intercept": round(float(w[0]), 12),
-            "impute": [round(float(m), 12) for m in means],
-            "target_column": target  # Store target column for evaluation
-        }
-        # charge for training time
-        cpu_ms = int((time.time() - start_time) * 1000)
-        self.quotas.charge("cpu_ms", cpu_ms)
-        return model
+        return w, means
 
     def _eval(self, model: Dict[str, Any], header: List[str], rows: List[List[Any]], target: str = "price") -> Dict[str, float]:
         start_time = time.time()
@@ -434,33 +682,34 @@ class VM:
         impute = model["impute"]
         coef = model["coef"]
         b = model["intercept"]
-        y_true, y_pred = [], []
-        for row in rows:
-            # skip rows missing target
-            if target not in idx:
-                continue
-            yt = row[idx[target]]
-
-            # Handle string representations of numbers (common in CSV)
-            if isinstance(yt, str):
-                try:
-                    yt = float(yt.replace('$', '').replace(',', ''))
-                except (ValueError, AttributeError):
-                    continue
-            elif not isinstance(yt, (int, float)):
-                continue
-
-            xs = []
-            for k, name in enumerate(feats):
-                v = row[idx[name]]
-                if isinstance(v, str):
+        y_true, X_rows = [], []
+        # rows missing the target column cannot be scored
+        if target in idx:
+            t = idx[target]
+            fidx = [idx[name] for name in feats]
+            for row in rows:
+                yt = row[t]
+
+                # Handle string representations of numbers (common in CSV)
+                if isinstance(yt, str):
                     try:
-                        v = float(v.replace('$', '').replace(',', ''))
+                        yt = float(yt.replace('$', '').replace(',', ''))
                     except (ValueError, AttributeError):
-                        v = impute[k]
-                xs.append(float(v) if isinstance(v,(int,float)) else float(impute[k]))
-            pred = b + sum(c*x for c, x in zip(coef, xs))
-            y_true.append(float(yt)); y_pred.append(float(pred))
+                        continue
+                elif not isinstance(yt, (int, float)):
+                    continue
+
+                xs = []
+                for k, j in enumerate(fidx):
+                    v = row[j]
+                    if isinstance(v, str):
+                        try:
+                            v = float(v.replace('$', '').replace(',', ''))
+                        except (ValueError, AttributeError):
+                            v = impute[k]
+                    xs.append(float(v) if isinstance(v,(int,float)) else float(impute[k]))
+                X_rows.append(xs)
+                y_true.append(float(yt))
 
         if not y_true:
             # For messy data, try to provide a fallback evaluation
@@ -485,8 +734,10 @@ class VM:
                     "validation_note": f"Invalid validation data detected - target '{target}' contains non-numeric values"
                 }
 
-        # Pure Python statistics
+        # Pure Python statistics: the metrics land in report.md, which is checksummed
+        # on replay, so they are summed in the same order on every install
         n = len(y_true)
+        y_pred = [b + sum(c*x for c, x in zip(coef, xs)) for xs in X_rows]
         mse = sum((y_true[i] - y_pred[i])**2 for i in range(n)) / n
         mae = sum(abs(y_true[i] - y_pred[i]) for i in range(n)) / n
 
@@ -531,21 +782,26 @@ class VM:
                     email_col = i
 
             if name_col is not None:
-                names = [row[name_col] for row in rows if len(row) > name_col]
-                # Check for similar names (basic duplicate detection)
-                for i, name1 in enumerate(names):
-                    for name2 in names[i+1:]:
-                        if isinstance(name1, str) and isinstance(name2, str):
-                            if name1.lower().strip() in name2.lower().strip() or name2.lower().strip() in name1.lower().strip():
+                # normalize once; only string names can match
+                names = [n.lower().strip() for n in self._columns(header, rows)[name_col] if isinstance(n, str)]
+                # each exact repeat is a name with a later match; enough of them
+                # settle the check without comparing pairs
+                repeats = sum(c - 1 for c in Counter(names).values())
+                if messy_indicators + repeats >= 3:
+                    messy_indicators = max(messy_indicators, 3)
+                else:
+                    # Check for similar names (basic duplicate detection)
+                    for i, name1 in enumerate(names):
+                        for name2 in names[i+1:]:
+                            if name1 in name2 or name2 in name1:
                                 messy_indicators += 1
                                 break
-                    if messy_indicators >= 3:
-                        break
+                        if messy_indicators >= 3:
+                            break
 
         # 3. Check for missing/inconsistent data
         if len(rows) > 0:
-            for col_idx in range(len(header)):
-                col_values = [row[col_idx] if len(row) > col_idx else None for row in rows]
+            for col_values in self._columns(header, rows):
                 missing_count = sum(1 for v in col_values if v is None or v == "")
                 if missing_count > 0:
                     messy_indicators += 1
@@ -555,7 +811,7 @@ class VM:
 
     def _resolve_data_conflicts(self, tbl: Dict[str, Any]) -> Dict[str, Any]:
         """Resolve conflicts in messy data and return enhanced profile"""
-        print("[vm] Detected messy data context - applying intelligent conflict resolution")
+        logger.debug("[vm] Detected messy data context - applying intelligent conflict resolution")
 
         header = tbl.get("header", [])
         rows = tbl.get("rows", [])
@@ -623,181 +879,233 @@ class VM:
 
     def run(self):
         print("[vm] starting")
-        self.tx.write({"op":"RUN_START"})
-        self.proc["state"] = "RUN"
-        pc = 0
-        while pc < len(self.prog):
-            ins = self.prog[pc]
-            op = ins[0]
-            print(f"[vm] {pc:02d} {op} {ins[1:]}")
-            # dispatch
-            if op == "CALL_TOOL":
-                tool_name, inputs_dict, outputs_dict = ins[1], ins[2], ins[3]
-                # Resolve input values from slots
-                resolved_inputs = {}
-                for key, value in inputs_dict.items():
-                    if isinstance(value, str) and value.startswith("S"):
-                        # Slot reference
-                        resolved_inputs[key] = self.mem.get(value)
-                    else:
-                        # Literal value
-                        resolved_inputs[key] = value
-
-                # Execute tool
-                try:
-                    result = self.tools.call_tool(tool_name, resolved_inputs, context=self)
-
-                    # Store outputs in slots
-                    for key, slot in outputs_dict.items():
-                        self.mem[slot] = result.get(key)
-
-                    # Track resource usage
-                    self.quotas.charge("cpu_ms", 10)  # Basic tool execution cost
-
-                except Exception as e:
-                    print(f"[vm] Tool {tool_name} failed: {e}")
-                    raise
-
-            elif op == "READ_CSV":
-                in_path, out_slot = ins[1], ins[2]
-                header, rows = self._fs_read_csv(in_path)
-                self.mem[out_slot] = {"header": header, "rows": rows}
-
-            elif op == "PROFILE":
-                in_slot, out_slot = ins[1], ins[2]
-                tbl = self.mem[in_slot]
-
-                # Check if this is a messy data resolution context
-                # Look for indicators in data structure or previous operations
-                is_messy_data_context = self._detect_messy_data_context(tbl)
-
-                if is_messy_data_context:
-                    # Use conflict resolution instead of basic profiling
-                    prof = self._resolve_data_conflicts(tbl)
-                else:
-                    # Standard profiling
-                    prof = self._profile(tbl["header"], tbl["rows"])
-
-                self.mem[out_slot] = prof
-
-            elif op == "SPLIT":
-                in_slot, ratio, seed, tr_slot, va_slot = ins[1], float(ins[2]), int(ins[3]), ins[4], ins[5]
-                tbl = self.mem[in_slot]
-                header, rows = tbl["header"], tbl["rows"]
-                # deterministic split: hash index+seed
-                tr, va = [], []
-                for i, r in enumerate(rows):
-                    h = hashlib.md5(f"{i}:{seed}".encode()).digest()[0]
-                    (tr if (h/255.0) < ratio else va).append(r)
-
-                # Ensure at least one validation row for small datasets
-                if len(va) == 0 and len(tr) > 1:
-                    va.append(tr.pop())
-
-                print(f"[vm] split: {len(tr)} train, {len(va)} val rows")
-                self.mem[tr_slot] = {"header": header, "rows": tr}
-                self.mem[va_slot] = {"header": header, "rows": va}
-
-            elif op == "TRAIN_LR":
-                tr_slot, target, out_slot = ins[1], ins[2], ins[3]
-                tbl = self.mem[tr_slot]
-                model = self._train_lr(tbl["header"], tbl["rows"], target)
-                self.mem[out_slot] = model
-
-            elif op == "EVAL":
-                model_slot, va_slot, out_slot = ins[1], ins[2], ins[3]
-                model = self.mem[model_slot]
-                tbl = self.mem[va_slot]
-                # Extract target from the model (stored during training)
-                target = model.get("target_column", "price")  # Use target from training
-                metrics = self._eval(model, tbl["header"], tbl["rows"], target)
-                self.mem[out_slot] = metrics
-
-            elif op == "ASSERT_GE":
-                slot, field, thr = ins[1], ins[2], float(ins[3])
-                val = float(self.mem[slot].get(field, float("-inf")))
-                self.tx.write({"op":"ASSERT_GE", "field": field, "value": val, "threshold": thr, "ok": val >= thr})
-                if val < thr:
-                    raise RuntimeError(f"Guard failed: {field}={val:.4f} < {thr}")
-
-            elif op == "EMIT_REPORT":
-                schema_slot, metrics_slot, out_path = ins[1], ins[2], ins[3]
-                sch = self.mem[schema_slot]; met = self.mem[metrics_slot]
-                md = self._render_report(sch, met)
-                self._fs_write_text(out_path, md)
-
-            elif op == "BUILD_CLI":
-                model_slot, schema_slot, out_dir = ins[1], ins[2], ins[3]
-                self._fs_mkdir(out_dir)
-                model = self.mem[model_slot]; schema = self.mem[schema_slot]
-                # persist model as JSON (use .npz name from spec but store JSON for simplicity)
-                self._fs_write_json(str(Path(out_dir) / "model.npz"), model)
-                self._fs_write_json(str(Path(out_dir) / "schema.json"), schema)
-                self._fs_write_text(str(Path(out_dir) / "predict.py"), PREDICT_PY)
-
-            elif op == "ZIP":
-                src_dir, dest_zip = ins[1], ins[2]
-                self._zip_dir(src_dir, dest_zip)
-
-            elif op == "VERIFY_ZIP":
-                self._verify_zip(ins[1])
-
-            elif op == "VERIFY_CLI":
-                app_dir, sample = ins[1], ins[2]
-                _ = self._proc_spawn_cli_predict(app_dir, sample)
-
+        try:
+            self.tx.write({"op":"RUN_START"})
+            self.proc["state"] = "RUN"
+            pc = 0
+            trace = logger.isEnabledFor(logging.DEBUG)
+            while pc < len(self.prog):
+                ins = self.prog[pc]
+                op = ins[0]
+                if trace:
+                    logger.debug("[vm] %02d %s %s", pc, op, ins[1:])
+                # dispatch
+                handler = self._ops.get(op)
+                if handler is None:
+                    raise NotImplementedError(f"Opcode not implemented: {op}")
+                handler(ins)
+                pc += 1
+
+            self.proc["state"] = "DONE"
+            self.tx.write({"op":"RUN_END"})
+            print("[vm] finished OK")
+            # write checksums for this run if not dry
+            if not self.dry:
+                self._write_out_checksums()
+        finally:
+            # persist buffered tx records and policy changes even when an opcode fails
+            self.tx.flush()
+            self.policy.flush()
+            self._close_predictor()
+
+    def _op_call_tool(self, ins: List[Any]):
+        tool_name, inputs_dict, outputs_dict = ins[1], ins[2], ins[3]
+        # Resolve input values from slots
+        resolved_inputs = {}
+        for key, value in inputs_dict.items():
+            if isinstance(value, str) and value.startswith("S"):
+                # Slot reference
+                resolved_inputs[key] = self.mem.get(value)
             else:
-                raise NotImplementedError(f"Opcode not implemented: {op}")
+                # Literal value
+                resolved_inputs[key] = value
 
-            pc += 1
+        # Execute tool
+        try:
+            result = self.tools.call_tool(tool_name, resolved_inputs, context=self)
 
-        self.proc["state"] = "DONE"
-        self.tx.write({"op":"RUN_END"})
-        print("[vm] finished OK")
-        # write checksums for this run if not dry
-        if not self.dry:
-            self._write_out_checksums()
+            # Store outputs in slots
+            for key, slot in outputs_dict.items():
+                self.mem[slot] = result.get(key)
+
+            # Track resource usage
+            self.quotas.charge("cpu_ms", 10)  # Basic tool execution cost
+
+        except Exception as e:
+            print(f"[vm] Tool {tool_name} failed: {e}")
+            raise
+
+    def _op_read_csv(self, ins: List[Any]):
+        in_path, out_slot = ins[1], ins[2]
+        header, rows = self._fs_read_csv(in_path)
+        self.mem[out_slot] = {"header": header, "rows": rows}
+
+    def _op_profile(self, ins: List[Any]):
+        in_slot, out_slot = ins[1], ins[2]
+        tbl = self.mem[in_slot]
+
+        # Check if this is a messy data resolution context
+        # Look for indicators in data structure or previous operations
+        is_messy_data_context = self._detect_messy_data_context(tbl)
 
-    def _walk_files(self, root: Path) -> List[Path]:
-        out = []
-        for r, _, files in os.walk(root):
-            for fn in files:
-                out.append(Path(r) / fn)
-        return out
+        if is_messy_data_context:
+            # Use conflict resolution instead of basic profiling
+            prof = self._resolve_data_conflicts(tbl)
+        else:
+            # Standard profiling
+            prof = self._profile(tbl["header"], tbl["rows"])
+
+        self.mem[out_slot] = prof
+
+    def _op_split(self, ins: List[Any]):
+        in_slot, ratio, seed, tr_slot, va_slot = ins[1], float(ins[2]), int(ins[3]), ins[4], ins[5]
+        tbl = self.mem[in_slot]
+        header, rows = tbl["header"], tbl["rows"]
+        # deterministic split: hash index+seed
+        mask = self._split_mask(len(rows), ratio, seed)
+        tr = list(compress(rows, mask))
+        va = [r for r, m in zip(rows, mask) if not m]
+
+        # Ensure at least one validation row for small datasets
+        if len(va) == 0 and len(tr) > 1:
+            va.append(tr.pop())
+
+        print(f"[vm] split: {len(tr)} train, {len(va)} val rows")
+        self.mem[tr_slot] = {"header": header, "rows": tr}
+        self.mem[va_slot] = {"header": header, "rows": va}
+
+    def _op_train_lr(self, ins: List[Any]):
+        tr_slot, target, out_slot = ins[1], ins[2], ins[3]
+        tbl = self.mem[tr_slot]
+        model = self._train_lr(tbl["header"], tbl["rows"], target)
+        self.mem[out_slot] = model
+
+    def _op_eval(self, ins: List[Any]):
+        model_slot, va_slot, out_slot = ins[1], ins[2], ins[3]
+        model = self.mem[model_slot]
+        tbl = self.mem[va_slot]
+        # Extract target from the model (stored during training)
+        target = model.get("target_column", "price")  # Use target from training
+        metrics = self._eval(model, tbl["header"], tbl["rows"], target)
+        self.mem[out_slot] = metrics
+
+    def _op_assert_ge(self, ins: List[Any]):
+        slot, field, thr = ins[1], ins[2], float(ins[3])
+        val = float(self.mem[slot].get(field, float("-inf")))
+        self.tx.write({"op":"ASSERT_GE", "field": field, "value": val, "threshold": thr, "ok": val >= thr})
+        if val < thr:
+            raise RuntimeError(f"Guard failed: {field}={val:.4f} < {thr}")
+
+    def _op_emit_report(self, ins: List[Any]):
+        schema_slot, metrics_slot, out_path = ins[1], ins[2], ins[3]
+        sch = self.mem[schema_slot]; met = self.mem[metrics_slot]
+        md = self._render_report(sch, met)
+        self._fs_write_text(out_path, md)
+
+    def _op_build_cli(self, ins: List[Any]):
+        model_slot, schema_slot, out_dir = ins[1], ins[2], ins[3]
+        self._fs_mkdir(out_dir)
+        model = self.mem[model_slot]; schema = self.mem[schema_slot]
+        # persist model as JSON (use .npz name from spec but store JSON for simplicity)
+        self._fs_write_json(str(Path(out_dir) / "model.npz"), model)
+        self._fs_write_json(str(Path(out_dir) / "schema.json"), schema)
+        self._fs_write_text(str(Path(out_dir) / "predict.py"), PREDICT_PY)
+
+    def _op_zip(self, ins: List[Any]):
+        src_dir, dest_zip = ins[1], ins[2]
+        self._zip_dir(src_dir, dest_zip)
+
+    def _op_verify_zip(self, ins: List[Any]):
+        self._verify_zip(ins[1])
+
+    def _op_verify_cli(self, ins: List[Any]):
+        app_dir, sample = ins[1], ins[2]
+        _ = self._proc_spawn_cli_predict(app_dir, sample)
+
+    def _walk_files(self, root: Path) -> Iterator[Path]:
+        # iterative scandir walk; like os.walk, directory symlinks are not followed or listed
+        stack = [str(root)]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for e in it:
+                    if not e.is_dir():
+                        yield Path(e.path)
+                    elif not e.is_symlink():
+                        stack.append(e.path)
 
     def _write_out_checksums(self):
         out_dir = self.sbx / "out"
+        # nothing emitted: don't create a manifest of nothing
+        if not out_dir.is_dir():
+            return
+        with os.scandir(out_dir) as it:
+            if next(it, None) is None:
+                return
         checks: Dict[str, str] = {}
-        if out_dir.exists():
-            for p in self._walk_files(out_dir):
-                rel = str(p.relative_to(self.sbx))
-                checks[rel] = sha256_file(p)
+        # previous hashes keyed by (mtime_ns, size): unchanged outputs are not rehashed
+        cache_path = self.sbx / "cache" / "out_hashes.json"
+        prior = self._load_hash_cache(cache_path)
+        # a file modified this close to the scan could be rewritten again within the
+        # same mtime tick at the same size; such hashes are used but not cached
+        settled_ns = time.time_ns() - HASH_CACHE_SETTLE_NS
+        fresh: Dict[str, List[Any]] = {}
+        todo: List[Tuple[str, Path, os.stat_result]] = []
+        for p in self._walk_files(out_dir):
+            rel = str(p.relative_to(self.sbx))
+            st = p.stat()
+            hit = prior.get(rel)
+            if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+                checks[rel] = hit[2]
+                fresh[rel] = hit
+            else:
+                todo.append((rel, p, st))
+        # hashlib releases the GIL while hashing, so files are hashed in parallel
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as ex:
+            for (rel, _, st), digest in zip(todo, ex.map(sha256_file, [t[1] for t in todo])):
+                checks[rel] = digest
+                if st.st_mtime_ns < settled_ns:
+                    fresh[rel] = [st.st_mtime_ns, st.st_size, digest]
+        # built in sorted key order so the encoders need not sort; paths are
+        # written as UTF-8, identically by orjson and json
         payload = {
-            "run_id": self.run_id,
-            "checksums": checks
+            "checksums": dict(sorted(checks.items())),
+            "run_id": self.run_id
         }
-        path = self.sbx / "out" / "checksums.json"
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(payload, indent=2, sort_keys=True, separators=(',', ': '), ensure_ascii=True), encoding="utf-8")
+        path = out_dir / "checksums.json"
+        if orjson is not None:
+            data = orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(payload, indent=2, separators=(',', ': '), ensure_ascii=False).encode("utf-8")
+        # atomic: a crash mid-write never leaves a truncated manifest
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
         self.tx.write({"op":"WRITE_CHECKSUMS", "path": str(path), "count": len(checks)})
+        self._save_hash_cache(cache_path, fresh)
+
+    @staticmethod
+    def _load_hash_cache(cache_path: Path) -> Dict[str, List[Any]]:
+        try:
+            raw = cache_path.read_bytes()
+            return orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_hash_cache(cache_path: Path, entries: Dict[str, List[Any]]):
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_bytes(orjson.dumps(entries) if orjson is not None else json.dumps(entries).encode("utf-8"))
+        except OSError as e:
+            print(f"[vm] WARN: could not write hash cache {cache_path}: {e}")
 
     @staticmethod
     def _render_report(schema: Dict[str, Any], metrics: Dict[str, float]) -> str:
-        lines = ["# FORGE Report", "", "## Schema"]
-        lines.append(f"Rows: {schema.get('rows',0)}")
-        lines.append("")
-        lines.append("| column | dtype | missing |")
-        lines.append("|---|---|---:|")
-        for c in schema.get("cols", []):
-            lines.append(f"| {c['name']} | {c['dtype']} | {c['missing']:.3f} |")
-        lines.append("")
-        lines.append("## Metrics")
-        for k, v in metrics.items():
-            if isinstance(v, (int, float)):
-                lines.append(f"- **{k}**: {v:.6f}")
-            else:
-                lines.append(f"- **{k}**: {v}")
-        return "\n".join(lines)
+        head = ["# FORGE Report", "", "## Schema", f"Rows: {schema.get('rows',0)}", "",
+                "| column | dtype | missing |", "|---|---|---:|"]
+        col_lines = [f"| {c['name']} | {c['dtype']} | {c['missing']:.3f} |" for c in schema.get("cols", [])]
+        metric_lines = [_metric_fmt(v).format(k, v) for k, v in metrics.items()]
+        return "\n".join(head + col_lines + ["", "## Metrics"] + metric_lines)
 
 # Deterministic CLI for app (written by BUILD_CLI)
 PREDICT_PY = """\
@@ -826,6 +1134,7 @@ if __name__ == '__main__':
 
 # Entry point utility
 def run_bytecode(bytecode_path: Path, sandbox_root: Path, dry_run: bool = False, auto_yes: bool = False):
-    bc = json.loads(Path(bytecode_path).read_text(encoding="utf-8"))
+    raw = Path(bytecode_path).read_bytes()
+    bc = orjson.loads(raw) if orjson is not None else json.loads(raw)
     vm = VM(bc, sandbox_root, dry_run=dry_run, auto_yes=auto_yes)
     vm.run()
\ No newline at end of file
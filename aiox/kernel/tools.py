@@ -1,11 +1,15 @@
 # kernel/tools.py - Tool Registry and Dynamic Discovery
 from __future__ import annotations
 import json
-import importlib.util
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Set
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 from dataclasses import dataclass
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used instead
+    orjson = None
+
 
 @dataclass
 class ToolSpec:
@@ -24,10 +28,60 @@ class ToolSpec:
 class ToolRegistry:
     """Registry for dynamic tool discovery and loading"""
 
-    def __init__(self, tools_root: Path):
+    def __init__(self, tools_root: Path, cache_path: Optional[Path] = None):
         self.tools_root = tools_root
         self.tools: Dict[str, ToolSpec] = {}
         self.loaded_modules: Dict[str, Any] = {}
+        self._validators: Dict[str, Tuple[ToolSpec, Callable[[Dict[str, Any]], List[str]]]] = {}
+        self._caps_cache: Dict[frozenset, frozenset] = {}
+        # bumped whenever the tool set changes; lets callers key their own caches
+        self.version = 0
+        # optional manifest cache: path -> [mtime_ns, size, manifest]
+        self.cache_path = cache_path
+        self._manifest_cache: Dict[str, List[Any]] = {}
+        self._cache_dirty = False
+
+    def _load_manifest_cache(self):
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            raw = self.cache_path.read_bytes()
+            self._manifest_cache = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except (OSError, ValueError):
+            self._manifest_cache = {}
+
+    def _save_manifest_cache(self, seen: Set[str]):
+        if self.cache_path is None:
+            return
+        # drop entries for manifests that no longer exist
+        stale = self._manifest_cache.keys() - seen
+        for key in stale:
+            del self._manifest_cache[key]
+        if not (self._cache_dirty or stale):
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            if orjson is not None:
+                data = orjson.dumps(self._manifest_cache)
+            else:
+                data = json.dumps(self._manifest_cache).encode("utf-8")
+            self.cache_path.write_bytes(data)
+        except OSError as e:
+            print(f"[tools] Failed to write manifest cache {self.cache_path}: {e}")
+        self._cache_dirty = False
+
+    def _read_manifest(self, path: Path) -> Dict[str, Any]:
+        """Parse a manifest, reusing the cached copy while its mtime and size are unchanged"""
+        st = path.stat()
+        key = str(path)
+        hit = self._manifest_cache.get(key)
+        if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if self.cache_path is not None:
+            self._manifest_cache[key] = [st.st_mtime_ns, st.st_size, manifest]
+            self._cache_dirty = True
+        return manifest
 
     def discover_tools(self) -> int:
         """Scan tools directory and load manifests (both tool.json and spec.json)"""
@@ -36,10 +90,14 @@ class ToolRegistry:
         if not self.tools_root.exists():
             return discovered
 
+        self._load_manifest_cache()
+        tool_jsons = list(self.tools_root.rglob("tool.json"))
+        spec_jsons = list(self.tools_root.rglob("spec.json"))
+
         # Find all tool.json files (basic tools)
-        for tool_json in self.tools_root.rglob("tool.json"):
+        for tool_json in tool_jsons:
             try:
-                manifest = json.loads(tool_json.read_text(encoding="utf-8"))
+                manifest = self._read_manifest(tool_json)
 
                 # Validate required fields for tool.json format
                 required = ["name", "version", "description", "category", "inputs", "outputs", "capabilities", "implementation"]
@@ -60,15 +118,16 @@ class ToolRegistry:
                 )
 
                 self.tools[spec.name] = spec
+                self._validators[spec.name] = (spec, self._compile_validator(spec))
                 discovered += 1
 
             except Exception as e:
                 print(f"[tools] Failed to load tool.json manifest {tool_json}: {e}")
 
         # Find all spec.json files (advanced tools)
-        for spec_json in self.tools_root.rglob("spec.json"):
+        for spec_json in spec_jsons:
             try:
-                manifest = json.loads(spec_json.read_text(encoding="utf-8"))
+                manifest = self._read_manifest(spec_json)
 
                 # Validate required fields for spec.json format (no version/implementation required)
                 required = ["name", "description", "category", "inputs", "outputs", "capabilities"]
@@ -93,12 +152,16 @@ class ToolRegistry:
                 )
 
                 self.tools[spec.name] = spec
+                self._validators[spec.name] = (spec, self._compile_validator(spec))
                 discovered += 1
 
             except Exception as e:
                 print(f"[tools] Failed to load spec.json manifest {spec_json}: {e}")
 
-        print(f"[tools] Discovered {discovered} tools ({len([p for p in self.tools_root.rglob('tool.json')])} basic + {len([p for p in self.tools_root.rglob('spec.json')])} advanced)")
+        self._invalidate_caches()
+        self._save_manifest_cache({str(p) for p in tool_jsons} | {str(p) for p in spec_jsons})
+
+        print(f"[tools] Discovered {discovered} tools ({len(tool_jsons)} basic + {len(spec_jsons)} advanced)")
         return discovered
 
     def get_tool(self, name: str) -> Optional[ToolSpec]:
@@ -115,12 +178,23 @@ class ToolRegistry:
 
     def get_required_capabilities(self, tool_names: List[str]) -> Set[str]:
         """Get all capabilities required by a list of tools"""
-        capabilities = set()
-        for name in tool_names:
-            tool = self.get_tool(name)
-            if tool:
-                capabilities.update(tool.capabilities)
-        return capabilities
+        # planners ask for the same tool subsets repeatedly; order and duplicates don't matter.
+        # A frozenset key also takes steps with no tool name (None), which match no tool.
+        key = frozenset(tool_names)
+        caps = self._caps_cache.get(key)
+        if caps is None:
+            capabilities = set()
+            for name in key:
+                tool = self.get_tool(name)
+                if tool:
+                    capabilities.update(tool.capabilities)
+            caps = self._caps_cache[key] = frozenset(capabilities)
+        return set(caps)
+
+    def _invalidate_caches(self):
+        """Drop results derived from self.tools; call after registering tools"""
+        self._caps_cache.clear()
+        self.version += 1
 
     def get_all_tool_names(self) -> List[str]:
         """Get all discovered tool names for APL schema generation"""
@@ -139,6 +213,9 @@ class ToolRegistry:
         if not tool:
             return None
 
+        # deferred: planner-only processes never load tool code
+        import importlib.util
+
         try:
             # Convert relative path to absolute
             impl_path = self.tools_root.parent / tool.implementation
@@ -180,29 +257,29 @@ class ToolRegistry:
         except Exception as e:
             raise RuntimeError(f"Tool {tool_name} execution failed: {e}")
 
+    @staticmethod
+    def _compile_validator(tool: ToolSpec) -> Callable[[Dict[str, Any]], List[str]]:
+        """Precompute the required and allowed input names for a tool"""
+        required = tuple(n for n, spec in tool.inputs.items() if "default" not in spec)
+        allowed = frozenset(tool.inputs)
+
+        def validate(inputs: Dict[str, Any]) -> List[str]:
+            errors = [f"Missing required input: {n}" for n in required if n not in inputs]
+            unexpected = inputs.keys() - allowed
+            if unexpected:
+                errors.append(f"Unexpected inputs: {', '.join(unexpected)}")
+            return errors
+
+        return validate
+
     def validate_tool_inputs(self, tool_name: str, inputs: Dict[str, Any]) -> List[str]:
         """Validate inputs against tool specification"""
         tool = self.get_tool(tool_name)
         if not tool:
             return [f"Tool not found: {tool_name}"]
 
-        errors = []
-
-        # Check required inputs
-        for input_name, input_spec in tool.inputs.items():
-            if input_name not in inputs:
-                if "default" not in input_spec:
-                    errors.append(f"Missing required input: {input_name}")
-            else:
-                # Basic type checking could go here
-                pass
-
-        # Check for unexpected inputs
-        expected_inputs = set(tool.inputs.keys())
-        actual_inputs = set(inputs.keys())
-        unexpected = actual_inputs - expected_inputs
-
-        if unexpected:
-            errors.append(f"Unexpected inputs: {', '.join(unexpected)}")
-
-        return errors
\ No newline at end of file
+        # validators are built once per spec; a re-registered tool gets a fresh one
+        cached = self._validators.get(tool_name)
+        if cached is None or cached[0] is not tool:
+            cached = self._validators[tool_name] = (tool, self._compile_validator(tool))
+        return cached[1](inputs)
@@ -1,34 +1,67 @@
 # kernel/undo.py
 from __future__ import annotations
-import json, os, shutil
+import json, mmap, os, stat
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any
 
-def _read_tx(log_path: Path) -> List[Dict[str, Any]]:
+try:
+    import orjson
+except ImportError:  # optional: faster parsing of large tx logs
+    orjson = None
+
+TX_READ_CHUNK = 64 * 1024
+
+def _iter_tx_reverse(log_path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield tx records newest first, walking a read-only mapping of the log backwards."""
     if not log_path.exists():
+        return
+    loads = orjson.loads if orjson is not None else json.loads
+    with log_path.open("rb") as f:
+        end = os.fstat(f.fileno()).st_size
+        if end == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            while end > 0:
+                # back up about one chunk, to the start of a line
+                start = mm.rfind(b"\n", 0, max(0, end - TX_READ_CHUNK)) + 1
+                yield from reversed(_parse_lines(mm[start:end].split(b"\n"), loads))
+                end = start
+
+def _parse_lines(lines: List[bytes], loads) -> List[Dict[str, Any]]:
+    # parse a block of JSON lines as one array: one parser call instead of one per line
+    nonempty = [line for line in lines if line.strip()]
+    if not nonempty:
         return []
-    return [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    try:
+        return loads(b"[" + b",".join(nonempty) + b"]")
+    except ValueError:
+        # orjson rejects the NaN/Infinity TxLogger writes for non-finite floats
+        # (e.g. ASSERT_GE on a missing field); the stdlib parser takes them
+        return [json.loads(line) for line in nonempty]
 
 def undo_last_run(sandbox_root: Path) -> int:
     tx_path = sandbox_root / "logs" / "tx.jsonl"
-    recs = _read_tx(tx_path)
-    if not recs:
-        print("[undo] No transactions logged.")
-        return 0
 
-    # find last RUN_START / RUN_END block
+    # walk back to the last RUN_START, keeping only the records after it
+    seen = False
+    tail: List[Dict[str, Any]] = []
     last_run_id = None
-    for r in reversed(recs):
+    for r in _iter_tx_reverse(tx_path):
+        seen = True
         if r.get("op") == "RUN_START":
             last_run_id = r.get("run_id")
             break
+        tail.append(r)
+    if not seen:
+        print("[undo] No transactions logged.")
+        return 0
     if not last_run_id:
         print("[undo] No complete run found.")
         return 0
 
     # collect created paths for that run, in order
     created: List[Path] = []
-    for r in recs:
+    for r in reversed(tail):
         if r.get("run_id") != last_run_id:
             continue
         op = r.get("op")
@@ -44,15 +77,19 @@ def undo_last_run(sandbox_root: Path) -> int:
         elif op == "WRITE_CHECKSUMS":
             created.append(Path(r["path"]))
 
-    # Undo in reverse order (files then dirs)
+    # Undo deepest paths first (files then dirs); the VM logs sandbox paths
+    # already resolved, so one lstat per path decides what to do
     n = 0
-    for p in reversed(created):
+    for p in sorted(reversed(created), key=lambda q: len(q.parts), reverse=True):
         try:
-            p = p.resolve()
-            if p.is_file():
-                p.unlink(missing_ok=True)
+            try:
+                st = os.lstat(p)
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                os.unlink(p)
                 n += 1
-            elif p.is_dir():
+            elif stat.S_ISDIR(st.st_mode):
                 # remove dir if empty; ignore if not empty
                 try:
                     os.rmdir(p)
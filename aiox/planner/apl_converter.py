@@ -1,15 +1,39 @@
 # aiox/planner/apl_converter.py - Convert ExecutionPlan to APL format
 from __future__ import annotations
-from datetime import datetime
+import logging
+from time import gmtime
 from typing import Dict, Any, List, Optional
 from .core import ExecutionPlan, PlanStep
 
+logger = logging.getLogger(__name__)
+
+# literal step inputs that become APL args rather than inputs
+_ARG_KEYS = frozenset({"ratio", "seed", "threshold"})
+
+
+def _join_list(value: list) -> str:
+    return ", ".join(map(str, value))
+
+
+# plan input coercion by exact type: lists become comma-separated strings,
+# everything else (str, dict, tuple, numbers) its str() representation
+_INPUT_COERCERS = {str: str, list: _join_list, dict: str, tuple: str}
+
+
+def _coerce_input(value: Any) -> str:
+    coerce = _INPUT_COERCERS.get(type(value))
+    if coerce is None:  # other types and list subclasses
+        coerce = _join_list if isinstance(value, list) else str
+    return coerce(value)
+
 
 class APLConverter:
     """Convert ExecutionPlan to APL JSON format"""
 
     def __init__(self, tools_registry=None):
         self.tools_registry = tools_registry
+        # tools missing from the registry during the current conversion
+        self._unknown_tools: List[str] = []
         # UPDATED: Use current tool names directly (no more legacy mappings)
         # The schema is now dynamic, so we use actual discovered tool names
 
@@ -19,36 +43,30 @@ class APLConverter:
         apl_steps = []
         symbol_map = {}  # Track variable mappings
 
+        self._unknown_tools = []
         for step in plan.steps:
             apl_step = self._convert_step(step, symbol_map)
             if apl_step:  # Only add valid steps
                 apl_steps.append(apl_step)
+        if self._unknown_tools:
+            # one warning per plan rather than one print per step
+            logger.warning("Tools not found in registry (steps skipped): %s", ", ".join(self._unknown_tools))
 
         # Generate APL structure (STRICTLY schema compliant - only allowed fields)
         apl = {
             "goal": plan.goal,
-            "capabilities": sorted(list(plan.capabilities)),
+            "capabilities": sorted(plan.capabilities),
             "steps": apl_steps
         }
 
         # Only add optional fields if they have content and are schema-valid
         if plan.inputs:
             # Ensure inputs conform to schema (string values only)
-            schema_inputs = {}
-            for key, value in plan.inputs.items():
-                if isinstance(value, list):
-                    # Convert list to comma-separated string
-                    schema_inputs[key] = ", ".join(str(v) for v in value)
-                elif isinstance(value, (dict, tuple)):
-                    # Convert complex types to string representation
-                    schema_inputs[key] = str(value)
-                else:
-                    # String values are fine as-is
-                    schema_inputs[key] = str(value)
-            apl["inputs"] = schema_inputs
+            apl["inputs"] = {key: _coerce_input(value) for key, value in plan.inputs.items()}
 
         # Add _generated_at as it's in the schema (optional field)
-        apl["_generated_at"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        t = gmtime()
+        apl["_generated_at"] = f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}T{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}Z"
 
         # IMPORTANT: Do not add any fields that are not in the schema
         # Schema allows: goal, capabilities, steps, inputs, triggers, verify, rollback, _generated_at
@@ -64,7 +82,7 @@ class APLConverter:
 
         # Validate operation exists in tool registry if available
         if self.tools_registry and not self.tools_registry.get_tool(op):
-            print(f"Warning: Tool '{op}' not found in registry")
+            self._unknown_tools.append(op)
             return None
 
         # Process inputs - resolve variable references
@@ -72,7 +90,7 @@ class APLConverter:
         apl_args = {}
 
         for key, value in step.inputs.items():
-            if isinstance(value, str) and value.startswith('$'):
+            if isinstance(value, str) and value[:1] == '$':
                 # Variable reference
                 var_name = value[1:]  # Remove $
                 if var_name in symbol_map:
@@ -81,7 +99,7 @@ class APLConverter:
                     apl_inputs[key] = value  # Keep as-is if not mapped
             else:
                 # Literal value or argument
-                if key in ['ratio', 'seed', 'threshold']:
+                if key in _ARG_KEYS:
                     apl_args[key] = value
                 else:
                     apl_inputs[key] = value
@@ -89,20 +107,12 @@ class APLConverter:
         # Process outputs - create variable mappings
         apl_out = None
         if step.outputs:
-            # For single output, use the variable name directly
-            if len(step.outputs) == 1:
-                output_var = list(step.outputs.values())[0]
-                if output_var.startswith('$'):
-                    output_var = output_var[1:]
-                    apl_out = f"${output_var}"
-                    symbol_map[output_var] = f"${output_var}"
-            else:
-                # Multiple outputs - use first one for now
-                first_output = list(step.outputs.values())[0]
-                if first_output.startswith('$'):
-                    output_var = first_output[1:]
-                    apl_out = f"${output_var}"
-                    symbol_map[output_var] = f"${output_var}"
+            # Single output maps directly; for multiple outputs use the first one for now
+            first_output = next(iter(step.outputs.values()))
+            if first_output[:1] == '$':
+                output_var = first_output[1:]
+                apl_out = f"${output_var}"
+                symbol_map[output_var] = apl_out
 
         # Build APL step (schema compliant only)
         apl_step = {
@@ -116,7 +126,7 @@ class APLConverter:
 
         # Add input specification
         if len(apl_inputs) == 1:
-            apl_step["in"] = list(apl_inputs.values())[0]
+            apl_step["in"] = next(iter(apl_inputs.values()))
         elif len(apl_inputs) > 1:
             apl_step["in"] = apl_inputs
 
@@ -147,10 +157,10 @@ class APLConverter:
         guards = []
 
         # Add quality check if model evaluation is present
-        has_eval = any(step.tool == 'eval' for step in plan.steps)
-        has_assert = any(step.tool == 'assert_ge' for step in plan.steps)
+        # one pass over the steps instead of one per tool we look for
+        ops = {step.tool for step in plan.steps}
 
-        if has_eval and not has_assert:
+        if 'eval' in ops and 'assert_ge' not in ops:
             guards.append({
                 "condition": "$metrics.R2 >= 0.6",
                 "message": "Model R² must be at least 0.6"
@@ -194,34 +204,28 @@ def plan_to_dict(plan: ExecutionPlan) -> Dict[str, Any]:
     }
 
 
-def visualize_plan_dag(plan: ExecutionPlan) -> str:
-    """Create ASCII DAG visualization of execution plan"""
-    lines = []
-    lines.append(f"Execution Plan: {plan.goal}")
-    lines.append("=" * 60)
-
-    for i, step in enumerate(plan.steps):
-        # Show step with inputs/outputs
-        arrow = "+->" if i == len(plan.steps) - 1 else "+->"
-        lines.append(f"{arrow} {step.id}: {step.tool}")
-        lines.append(f"   |  {step.description}")
-
-        # Show inputs
-        if step.inputs:
-            inputs_str = ", ".join(f"{k}={v}" for k, v in step.inputs.items())
-            lines.append(f"   |  inputs: {inputs_str}")
-
-        # Show outputs
-        if step.outputs:
-            outputs_str = ", ".join(f"{k}={v}" for k, v in step.outputs.items())
-            lines.append(f"   |  outputs: {outputs_str}")
+_fmt_pair = "{}={}".format
+
 
-        if i < len(plan.steps) - 1:
-            lines.append("   |")
+def _step_text(step: PlanStep) -> str:
+    """One step of the DAG view, with its inputs/outputs, as a single block"""
+    text = f"+-> {step.id}: {step.tool}\n   |  {step.description}"
+    if step.inputs:
+        text += "\n   |  inputs: " + ", ".join(map(_fmt_pair, step.inputs.keys(), step.inputs.values()))
+    if step.outputs:
+        text += "\n   |  outputs: " + ", ".join(map(_fmt_pair, step.outputs.keys(), step.outputs.values()))
+    return text
 
-    lines.append("")
-    lines.append(f"Required capabilities: {', '.join(sorted(plan.capabilities))}")
-    lines.append(f"Template: {plan.metadata.get('template', 'unknown')}")
-    lines.append(f"Complexity: {plan.metadata.get('complexity', 'unknown')}")
 
-    return "\n".join(lines)
\ No newline at end of file
+def visualize_plan_dag(plan: ExecutionPlan) -> str:
+    """Create ASCII DAG visualization of execution plan"""
+    parts = [f"Execution Plan: {plan.goal}", "=" * 60]
+    if plan.steps:
+        # consecutive steps are joined by a connector line
+        parts.append("\n   |\n".join(map(_step_text, plan.steps)))
+    parts.append(
+        f"\nRequired capabilities: {', '.join(sorted(plan.capabilities))}\n"
+        f"Template: {plan.metadata.get('template', 'unknown')}\n"
+        f"Complexity: {plan.metadata.get('complexity', 'unknown')}"
+    )
+    return "\n".join(parts)
\ No newline at end of file
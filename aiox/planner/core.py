@@ -8,6 +8,9 @@ from ..kernel.tools import ToolRegistry
 @dataclass
 class PlanStep:
     """A single step in the execution plan"""
+    # declared by hand: dataclass(slots=True) needs 3.10. Fields must not have defaults.
+    __slots__ = ("id", "tool", "inputs", "outputs", "description")
+
     id: str
     tool: str
     inputs: Dict[str, Any]
@@ -18,6 +21,8 @@ class PlanStep:
 @dataclass
 class ExecutionPlan:
     """Complete execution plan with metadata"""
+    __slots__ = ("goal", "steps", "capabilities", "inputs", "outputs", "metadata")
+
     goal: str
     steps: List[PlanStep]
     capabilities: Set[str]
@@ -39,8 +44,13 @@ class PlanGenerator:
         from .llm_planner import LLMPlanner
         self.llm_planner = LLMPlanner(tools_registry, sandbox_root)
 
-    def generate_plan(self, goal: str, input_csv: str = None, target_column: str = None, **kwargs) -> ExecutionPlan:
-        """Generate execution plan from natural language goal using LLM"""
+    def generate_plan(self, goal: str, input_csv: str = None, target_column: str = None,
+                      use_semantic_cache: bool = True, **kwargs) -> ExecutionPlan:
+        """Generate execution plan from natural language goal using LLM
+
+        use_semantic_cache=False asks the model even when a plan for an
+        equivalent goal is cached.
+        """
 
         # Prepare context for LLM
         context = {}
@@ -51,7 +61,7 @@ class PlanGenerator:
         context.update(kwargs)
 
         # Use LLM planner for task-agnostic planning
-        return self.llm_planner.plan_workflow(goal, **context)
+        return self.llm_planner.plan_workflow(goal, use_semantic_cache=use_semantic_cache, **context)
 
     def get_tools_registry(self):
         """Get access to the tools registry for APL conversion"""
@@ -3,134 +3,142 @@ from __future__ import annotations
 import os
 import json
 import getpass
+import hashlib
+import re
 import time
-from typing import Dict, Any, List, Optional, Set
+from typing import Dict, Any, List, Optional, Set, Tuple
 import anthropic
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used instead
+    orjson = None
+
 from .core import ExecutionPlan, PlanStep
 from ..kernel.tools import ToolRegistry
-from ..kernel.model_cache import ModelCallCache
 from ..kernel.replay_gate import ReplayGate
+from .semantic_cache import SemanticPlanCache
 
+# AIOX_SEMANTIC_CACHE=0 turns off reuse of plans for near-duplicate goals
+SEMANTIC_CACHE_ENABLED = os.environ.get("AIOX_SEMANTIC_CACHE", "1") != "0"
 
-class APIKeyManager:
-    """Secure API key management"""
+# kwargs naming the input file for the fallback plan, in priority order
+_INPUT_FILE_KEYS = ('csv', 'input_csv', 'file')
+# file names mentioned in a goal, for the fallback plan
+_FILENAME_RE = re.compile(r'(\w+\.\w+)')
 
-    @staticmethod
-    def get_claude_api_key() -> Optional[str]:
-        """Get Claude API key from environment or user input"""
-        # Try environment variable first
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if api_key:
-            return api_key
+# shared decoder for pulling the plan object out of LLM responses
+_JSON_DECODER = json.JSONDecoder()
 
-        api_key = os.getenv('CLAUDE_API_KEY')  # Alternative env var
-        if api_key:
-            return api_key
 
-        # Prompt user securely only in interactive mode
-        try:
-            import sys
-            if sys.stdin.isatty():  # Only prompt if in interactive terminal
-                print("Claude API key not found in environment variables.")
-                print("Please set ANTHROPIC_API_KEY or CLAUDE_API_KEY, or enter it now:")
-                api_key = getpass.getpass("Claude API Key: ").strip()
-                return api_key if api_key else None
-            else:
-                # Non-interactive mode - return None to trigger fallback
-                return None
-        except (KeyboardInterrupt, EOFError):
-            print("\nAPI key input cancelled.")
-            return None
+def _is_plan(obj: Any) -> bool:
+    return isinstance(obj, dict) and isinstance(obj.get("steps"), list)
 
 
-class LLMPlanner:
-    """LLM-based task-agnostic workflow planner with caching"""
+def _decode_plan_json(text: str) -> Dict[str, Any]:
+    """Decode the plan object in text; prose around it is ignored
 
-    def __init__(self, tools_registry: ToolRegistry, sandbox_root=None):
-        self.tools = tools_registry
-        self._client = None
-        self.sandbox_root = sandbox_root or "sandbox"
-        self.cache = ModelCallCache(self.sandbox_root)
-        self.replay_gate = ReplayGate(self.sandbox_root)
+    The plan is the first complete JSON object with a "steps" list. A '{' in
+    leading prose is skipped, but a truncated or malformed plan raises
+    instead of yielding one of its nested objects.
+    """
+    start = text.find('{')
+    if orjson is not None and start != -1:
+        # usual case: the reply is just the object, which orjson takes whole
+        try:
+            plan = orjson.loads(text[start:])
+            if _is_plan(plan):
+                return plan
+        except orjson.JSONDecodeError:
+            pass
+    while start != -1:
+        try:
+            obj, end = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            # not an object here (prose, or a broken plan); try the next '{'
+            start = text.find('{', start + 1)
+            continue
+        if _is_plan(obj):
+            return obj
+        # a complete object that is not the plan: never look inside it
+        start = text.find('{', end)
+    raise ValueError("No valid plan JSON found in LLM response")
 
-        # Generate dynamic operation list from discovered tools
-        from ..compiler.dynamic_schema import DynamicAPLSchema
-        self._schema_gen = DynamicAPLSchema(self.tools)
-        self._dynamic_operations = self._schema_gen.get_tools_by_category_for_llm()
 
-    def _get_client(self) -> anthropic.Anthropic:
-        """Get Anthropic client with API key"""
-        if self._client is None:
-            api_key = APIKeyManager.get_claude_api_key()
-            if not api_key:
-                raise RuntimeError("Claude API key is required for LLM-based planning")
-            self._client = anthropic.Anthropic(api_key=api_key)
-        return self._client
+def _str_step_inputs(value: str) -> Dict[str, Any]:
+    return {"data": value} if value[:1] == "$" else {"input": value}
 
-    def _get_tools_context(self) -> str:
-        """Generate tools context for LLM"""
-        tools_info = []
-        tools_info.append("Available Tools:")
 
-        for tool in self.tools.list_tools():
-            inputs_desc = []
-            for name, spec in tool.inputs.items():
-                type_info = spec.get('type', 'any')
-                desc = spec.get('description', '')
-                inputs_desc.append(f"{name} ({type_info}): {desc}")
+def _identity(value):
+    return value
 
-            outputs_desc = []
-            for name, spec in tool.outputs.items():
-                type_info = spec.get('type', 'any')
-                desc = spec.get('description', '')
-                outputs_desc.append(f"{name} ({type_info}): {desc}")
 
-            tools_info.append(f"\n- {tool.name} ({tool.category})")
-            tools_info.append(f"  Description: {tool.description}")
-            tools_info.append(f"  Inputs: {', '.join(inputs_desc) if inputs_desc else 'none'}")
-            tools_info.append(f"  Outputs: {', '.join(outputs_desc) if outputs_desc else 'none'}")
-            tools_info.append(f"  Capabilities: {', '.join(tool.capabilities)}")
+# LLM step in/out normalization by exact type; other values are wrapped whole
+_STEP_INPUTS = {str: _str_step_inputs, dict: _identity}
+_STEP_OUTPUTS = {str: lambda value: {"result": value}, dict: _identity}
 
-        return "\n".join(tools_info)
 
+def _normalize_step_io(table: Dict[type, Any], value: Any, default_key: str) -> Dict[str, Any]:
+    norm = table.get(type(value))
+    if norm is None:
+        # dict subclasses pass through; anything else becomes a single entry
+        return value if isinstance(value, dict) else {default_key: value}
+    return norm(value)
 
-    def _get_dynamic_operations_prompt(self) -> str:
-        """Generate dynamic operations section for LLM prompt"""
-        lines = []
-        lines.append("AVAILABLE OPERATIONS (from discovered tools):")
 
-        for category, tool_names in self._dynamic_operations.items():
-            lines.append(f"\n{category.upper()} OPERATIONS:")
-            for tool_name in sorted(tool_names):
-                tool = self.tools.get_tool(tool_name)
-                if tool:
-                    lines.append(f"- {tool_name}: {tool.description}")
+def _usage_counts(usage) -> Optional[Dict[str, int]]:
+    """Token counts from an API usage object, or None when the response has none"""
+    if not usage:
+        return None
+    return {
+        "input": usage.input_tokens,
+        "output": usage.output_tokens,
+        "cache_read": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_write": getattr(usage, "cache_creation_input_tokens", None) or 0
+    }
 
-        # Add standard operations that are always available
-        lines.append("\nSTANDARD OPERATIONS:")
-        lines.append("- guard: Assert conditions for validation")
 
-        return "\n".join(lines)
+class APIKeyManager:
+    """Secure API key management"""
 
-    def plan_workflow(self, goal: str, **kwargs) -> ExecutionPlan:
-        """Use LLM to plan workflow for any goal"""
-        client = self._get_client()
-        tools_context = self._get_tools_context()
+    # resolved once per process; later planners skip the env lookups and the prompt
+    _cached_key: Optional[str] = None
 
-        # Extract any provided parameters
-        context_info = []
-        if kwargs:
-            context_info.append("Additional Context:")
-            for key, value in kwargs.items():
-                if value is not None:
-                    context_info.append(f"- {key}: {value}")
+    @classmethod
+    def get_claude_api_key(cls) -> Optional[str]:
+        """Get Claude API key from environment or user input"""
+        if cls._cached_key is None:
+            # environment first (ANTHROPIC_API_KEY, then the alternative CLAUDE_API_KEY)
+            env = os.environ
+            cls._cached_key = (env.get('ANTHROPIC_API_KEY') or env.get('CLAUDE_API_KEY')
+                               or cls._prompt_for_key())
+        return cls._cached_key
 
-        context_str = "\n".join(context_info) if context_info else ""
+    @staticmethod
+    def _prompt_for_key() -> Optional[str]:
+        """Ask for the key, only when running in an interactive terminal"""
+        try:
+            import sys
+            if sys.stdin.isatty():  # Only prompt if in interactive terminal
+                print("Claude API key not found in environment variables.")
+                print("Please set ANTHROPIC_API_KEY or CLAUDE_API_KEY, or enter it now:")
+                api_key = getpass.getpass("Claude API Key: ").strip()
+                return api_key if api_key else None
+            else:
+                # Non-interactive mode - return None to trigger fallback
+                return None
+        except (KeyboardInterrupt, EOFError):
+            print("\nAPI key input cancelled.")
+            return None
 
-        # Get dynamic operations prompt
-        operations_prompt = self._get_dynamic_operations_prompt()
 
-        prompt = f"""You are an AI workflow planner for a TASK-AGNOSTIC automation system. Your job is to analyze ANY type of user goal and create an execution plan using available tools.
+class LLMPlanner:
+    """LLM-based task-agnostic workflow planner with caching"""
+
+    # Static prompt text. The system block is
+    #   _PROMPT_INTRO + tools context + _PROMPT_OPERATIONS_INTRO + operations list + _RESPONSE_SCHEMA
+    # and is marked for prompt caching; the user message carries only the goal and call context.
+    _PROMPT_INTRO = """You are an AI workflow planner for a TASK-AGNOSTIC automation system. Your job is to analyze ANY type of user goal and create an execution plan using available tools.
 
 SUPPORTED TASK CATEGORIES:
 - Data Processing & Analysis (any data type: CSV, JSON, text, images)
@@ -147,15 +155,15 @@ SUPPORTED TASK CATEGORIES:
 - Document Processing & Understanding
 - General Automation & Workflows
 
-{tools_context}
-
-{context_str}
+"""
 
-User Goal: {goal}
+    _PROMPT_OPERATIONS_INTRO = """
 
 CRITICAL: Your response will be converted to APL (Agent Plan Language) format. You MUST use only the operation names from the list below:
 
-{operations_prompt}
+"""
+
+    _RESPONSE_SCHEMA = """
 
 ADVANCED OPERATIONS USAGE:
 For messy data and business intelligence tasks, you can now use specialized operations:
@@ -173,52 +181,52 @@ IMPORTANT: Be creative and task-agnostic! The goal could be:
 - Or any other automation task!
 
 CRITICAL: You must respond with ONLY a JSON object using this EXACT structure:
-{{
-  "goal_analysis": {{
+{
+  "goal_analysis": {
     "intent": "brief description of what user wants",
     "complexity": "low|medium|high",
     "task_type": "data_processing|analysis|ml|visualization|research|file_ops|web|general"
-  }},
+  },
   "steps": [
-    {{
+    {
       "id": "step1",
       "op": "exact_apl_operation_name",
       "description": "what this step does",
       "in": "input_reference_or_$variable",
       "out": "$output_variable_name"
-    }}
+    }
   ],
-  "inputs": {{"main_input": "expected input file or data"}},
-  "outputs": {{"final_result": "expected output location"}},
+  "inputs": {"main_input": "expected input file or data"},
+  "outputs": {"final_result": "expected output location"},
   "capabilities": ["fs.read", "fs.write", "proc.spawn"]
-}}
+}
 
 STEP FORMAT EXAMPLE for "Analyze dataset and generate insights":
-{{
+{
   "steps": [
-    {{
+    {
       "id": "step1",
       "op": "read_csv",
       "description": "Load input data",
       "in": "sandbox/in/data.csv",
       "out": "$customer_data"
-    }},
-    {{
+    },
+    {
       "id": "step2",
       "op": "resolve_conflicts",
       "description": "Clean and deduplicate customer data",
-      "in": {{"crm_data": "$customer_data"}},
+      "in": {"crm_data": "$customer_data"},
       "out": "$clean_data"
-    }},
-    {{
+    },
+    {
       "id": "step3",
       "op": "business_insights",
       "description": "Generate actionable business insights",
-      "in": {{"customer_data": "$clean_data"}},
+      "in": {"customer_data": "$clean_data"},
       "out": "$insights"
-    }}
+    }
   ]
-}}
+}
 
 CRITICAL OPERATION NAME MAPPING:
 - For loading CSV files: use "read_csv" (NOT "load_csv")
@@ -242,14 +250,116 @@ Important constraints:
 - Do not add extra fields like "cleanup", "guards", or "_planner_metadata"
 - Keep the response as clean JSON only"""
 
+    def __init__(self, tools_registry: ToolRegistry, sandbox_root=None):
+        self.tools = tools_registry
+        self._client = None
+        self.sandbox_root = sandbox_root or "sandbox"
+        self.replay_gate = ReplayGate(self.sandbox_root)
+        # the gate's cache: its reads wait for the writes queued below
+        self.cache = self.replay_gate.cache
+        self.semantic_cache = SemanticPlanCache(self.sandbox_root)
+
+        # Generate dynamic operation list from discovered tools
+        from ..compiler.dynamic_schema import DynamicAPLSchema
+        self._schema_gen = DynamicAPLSchema(self.tools)
+        self._dynamic_operations = self._schema_gen.get_tools_by_category_for_llm()
+        # rendered tools context, keyed by registry version and size
+        self._tools_context_cache: Optional[tuple] = None
+        # (key, system text, system text sha256) of the static prompt block
+        self._system_prompt_cache: Optional[tuple] = None
+
+    def _get_client(self) -> anthropic.Anthropic:
+        """Get Anthropic client with API key"""
+        if self._client is None:
+            api_key = APIKeyManager.get_claude_api_key()
+            if not api_key:
+                raise RuntimeError("Claude API key is required for LLM-based planning")
+            self._client = anthropic.Anthropic(api_key=api_key)
+        return self._client
+
+    def _get_tools_context(self) -> str:
+        """Generate tools context for LLM"""
+        key = (self.tools.version, len(self.tools.tools))
+        cached = self._tools_context_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        text = "\n".join(["Available Tools:"] + [self._describe_tool(t) for t in self.tools.list_tools()])
+        self._tools_context_cache = (key, text)
+        return text
+
+    @staticmethod
+    def _describe_tool(tool) -> str:
+        """One tool's entry in the tools context, as a single block"""
+        inputs_str = ", ".join(f"{name} ({spec.get('type', 'any')}): {spec.get('description', '')}"
+                               for name, spec in tool.inputs.items()) or "none"
+        outputs_str = ", ".join(f"{name} ({spec.get('type', 'any')}): {spec.get('description', '')}"
+                                for name, spec in tool.outputs.items()) or "none"
+        return (f"\n- {tool.name} ({tool.category})\n"
+                f"  Description: {tool.description}\n"
+                f"  Inputs: {inputs_str}\n"
+                f"  Outputs: {outputs_str}\n"
+                f"  Capabilities: {', '.join(tool.capabilities)}")
+
+
+    def _get_dynamic_operations_prompt(self) -> str:
+        """Generate dynamic operations section for LLM prompt"""
+        lines = []
+        lines.append("AVAILABLE OPERATIONS (from discovered tools):")
+
+        for category, tool_names in self._dynamic_operations.items():
+            lines.append(f"\n{category.upper()} OPERATIONS:")
+            for tool_name in sorted(tool_names):
+                tool = self.tools.get_tool(tool_name)
+                if tool:
+                    lines.append(f"- {tool_name}: {tool.description}")
+
+        # Add standard operations that are always available
+        lines.append("\nSTANDARD OPERATIONS:")
+        lines.append("- guard: Assert conditions for validation")
+
+        return "\n".join(lines)
+
+    def _get_system_prompt(self) -> Tuple[str, str]:
+        """Static system prompt and its sha256, rebuilt only when the registry changes"""
+        key = (self.tools.version, len(self.tools.tools))
+        cached = self._system_prompt_cache
+        if cached is None or cached[0] != key:
+            text = (self._PROMPT_INTRO + self._get_tools_context() + self._PROMPT_OPERATIONS_INTRO
+                    + self._get_dynamic_operations_prompt() + self._RESPONSE_SCHEMA)
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            cached = self._system_prompt_cache = (key, text, digest)
+        return cached[1], cached[2]
+
+    def plan_workflow(self, goal: str, use_semantic_cache: bool = True, **kwargs) -> ExecutionPlan:
+        """Use LLM to plan workflow for any goal
+
+        use_semantic_cache=False always asks the model; the new plan then
+        replaces any cached one for the same goal.
+        """
+        client = self._get_client()
+
+        # Extract any provided parameters
+        context_info = []
+        if kwargs:
+            context_info.append("Additional Context:")
+            for key, value in kwargs.items():
+                if value is not None:
+                    context_info.append(f"- {key}: {value}")
+
+        context_str = "\n".join(context_info) if context_info else ""
+
+        system_text, system_sha256 = self._get_system_prompt()
+        prompt = f"User Goal: {goal}\n\n{context_str}" if context_str else f"User Goal: {goal}"
+
         try:
             model_name = "claude-3-5-haiku-20241022"
 
-            # Prepare inputs for caching
+            # Prepare inputs for caching; the static system block is keyed by its digest
             model_inputs = {
                 "model": model_name,
                 "max_tokens": 2000,
                 "temperature": 0.1,
+                "system_sha256": system_sha256,
                 "messages": [{"role": "user", "content": prompt}]
             }
 
@@ -259,55 +369,65 @@ Important constraints:
             if not replay_allowed:
                 raise RuntimeError("Model call not allowed during deterministic replay (missing from cache)")
 
+            cached_plan = None
             if replay_result:
                 print("[planner] Using cached LLM response (replay mode)")
                 response_text = replay_result.get("response_text", "")
-            else:
+            elif use_semantic_cache and SEMANTIC_CACHE_ENABLED:
+                # near-duplicate goals in the same context reuse an earlier plan
+                cached_plan = self.semantic_cache.lookup(goal, context_str, system_sha256)
+
+            if cached_plan is not None:
+                print("[planner] Reusing plan for an equivalent goal (semantic cache)")
+                # recorded below like a model reply, so replay finds this call
+                response_text = json.dumps(cached_plan)
+                token_usage = {"input": 0, "output": 0}
+                latency_ms = 0.0
+            elif not replay_result:
                 print("[planner] Making LLM API call...")
                 start_time = time.time()
 
-                response = client.messages.create(
+                # stream the reply so text is consumed as it arrives, then join once
+                with client.messages.stream(
                     model=model_name,
                     max_tokens=2000,
                     temperature=0.1,
+                    system=[{
+                        "type": "text",
+                        "text": system_text,
+                        "cache_control": {"type": "ephemeral"}
+                    }],
                     messages=[{"role": "user", "content": prompt}]
-                )
+                ) as stream:
+                    response_text = "".join(stream.text_stream)
+                    # keep only the usage counts, not the final message object
+                    token_usage = _usage_counts(getattr(stream.get_final_message(), "usage", None))
 
-                response_text = response.content[0].text
                 latency_ms = (time.time() - start_time) * 1000
 
-                # Store in cache
-                if self.cache:
-                    # Extract token usage if available
-                    token_usage = None
-                    if hasattr(response, 'usage') and response.usage:
-                        token_usage = {
-                            "input": response.usage.input_tokens,
-                            "output": response.usage.output_tokens
-                        }
-
-                    model_outputs = {
-                        "response_text": response_text,
-                        "usage": token_usage
-                    }
-
-                    self.cache.store_result(
-                        model_name,
-                        model_inputs,
-                        model_outputs,
-                        latency_ms,
-                        token_usage
-                    )
+            # Store in cache
+            if self.cache and not replay_result:
+                model_outputs = {
+                    "response_text": response_text,
+                    "usage": token_usage
+                }
+
+                # written off the planning path; one worker keeps the call log in order
+                self.cache.store_result_later(
+                    model_name,
+                    model_inputs,
+                    model_outputs,
+                    latency_ms,
+                    token_usage
+                )
 
             # Extract JSON from response (in case LLM adds explanation)
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start == -1 or json_end == 0:
-                raise ValueError("No valid JSON found in LLM response")
+            plan_data = _decode_plan_json(response_text)
+            plan = self._convert_llm_plan_to_execution_plan(plan_data, goal)
+            if not replay_result and cached_plan is None and self._passes_compile_schema(plan):
+                self.semantic_cache.add(goal, context_str, system_sha256, plan_data)
 
-            plan_data = json.loads(response_text[json_start:json_end])
-
-            return self._convert_llm_plan_to_execution_plan(plan_data, goal)
+            return plan
 
         except Exception as e:
             # Fallback to simple plan if LLM fails
@@ -315,6 +435,20 @@ Important constraints:
             print("Falling back to simple generic plan...")
             return self._create_fallback_plan(goal, **kwargs)
 
+    def _passes_compile_schema(self, plan: ExecutionPlan) -> bool:
+        """True when the plan's APL passes the schema the compiler validates against"""
+        try:
+            # deferred: the compiler pulls in jsonschema
+            from ..compiler.compile_bc import schema_validator
+            from .apl_converter import APLConverter
+            apl = APLConverter(self.tools).convert_to_apl(plan)
+            schema_validator(self._schema_gen.generate_schema()).validate(apl)
+        except Exception as e:
+            # jsonschema errors carry a one-line .message; str() adds the whole schema path
+            print(f"[planner] Not caching plan for reuse: {getattr(e, 'message', e)}")
+            return False
+        return True
+
     def _convert_llm_plan_to_execution_plan(self, plan_data: Dict[str, Any], original_goal: str) -> ExecutionPlan:
         """Convert LLM response to ExecutionPlan object"""
         goal_analysis = plan_data.get("goal_analysis", {})
@@ -325,24 +459,11 @@ Important constraints:
             # Use 'op' field from LLM response, not 'tool'
             operation = step_data.get("op", step_data.get("tool", "unknown"))
 
-            # Handle different input formats
-            step_inputs = step_data.get("in", step_data.get("inputs", {}))
-            if isinstance(step_inputs, str):
-                # Convert string input to dict
-                if step_inputs.startswith("$"):
-                    step_inputs = {"data": step_inputs}
-                else:
-                    step_inputs = {"input": step_inputs}
-            elif not isinstance(step_inputs, dict):
-                step_inputs = {"input": step_inputs}
-
-            # Handle different output formats
-            step_outputs = step_data.get("out", step_data.get("outputs", {}))
-            if isinstance(step_outputs, str):
-                # Convert string output to dict
-                step_outputs = {"result": step_outputs}
-            elif not isinstance(step_outputs, dict):
-                step_outputs = {"result": step_outputs}
+            # Handle different input/output formats (strings and scalars become dicts)
+            step_inputs = _normalize_step_io(
+                _STEP_INPUTS, step_data.get("in", step_data.get("inputs", {})), "input")
+            step_outputs = _normalize_step_io(
+                _STEP_OUTPUTS, step_data.get("out", step_data.get("outputs", {})), "result")
 
             step = PlanStep(
                 id=step_data.get("id", f"step{len(steps)+1}"),
@@ -353,12 +474,8 @@ Important constraints:
             )
             steps.append(step)
 
-        # Collect capabilities from selected tools
-        capabilities = set()
-        for step in steps:
-            tool_spec = self.tools.get_tool(step.tool)
-            if tool_spec:
-                capabilities.update(tool_spec.capabilities)
+        # Collect capabilities from selected tools (memoized per distinct tool set)
+        capabilities = self.tools.get_required_capabilities([step.tool for step in steps])
 
         # Add any additional capabilities from the plan
         capabilities.update(plan_data.get("capabilities", []))
@@ -382,16 +499,11 @@ Important constraints:
     def _create_fallback_plan(self, goal: str, **kwargs) -> ExecutionPlan:
         """Create a simple fallback plan if LLM fails"""
         # Try to detect if there's a file mentioned
-        input_file = None
-        for key, value in kwargs.items():
-            if key in ['csv', 'input_csv', 'file'] and value:
-                input_file = value
-                break
+        input_file = next((kwargs[k] for k in _INPUT_FILE_KEYS if kwargs.get(k)), None)
 
         if not input_file:
             # Look for file in goal text
-            import re
-            file_match = re.search(r'(\w+\.\w+)', goal)
+            file_match = _FILENAME_RE.search(goal)
             if file_match:
                 input_file = file_match.group(1)
 
@@ -416,12 +528,8 @@ Important constraints:
                     description="Analyze data structure"
                 ))
 
-        # Collect capabilities
-        capabilities = set()
-        for step in steps:
-            tool_spec = self.tools.get_tool(step.tool)
-            if tool_spec:
-                capabilities.update(tool_spec.capabilities)
+        # Collect capabilities (memoized per distinct tool set)
+        capabilities = self.tools.get_required_capabilities([step.tool for step in steps])
 
         return ExecutionPlan(
             goal=goal,
@@ -0,0 +1,119 @@
+# aiox/planner/semantic_cache.py - Reuse LLM plans for near-duplicate goals
+from __future__ import annotations
+import copy
+import json
+import re
+import threading
+from operator import mul
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # optional: only normalized-text matches are reused
+    SentenceTransformer = None
+
+# Cosine similarity above which two goals are treated as the same request
+SIMILARITY_THRESHOLD = 0.92
+# Oldest entries are dropped beyond this many cached plans
+MAX_ENTRIES = 512
+
+_WORD = re.compile(r"[\w./-]+")
+# politeness and articles that never change what a goal asks for
+_FILLER = frozenset(("please", "kindly", "can", "could", "would", "you", "the", "a", "an"))
+
+
+def normalize_goal(goal: str) -> str:
+    """Lowercased goal words in order, without filler words or punctuation"""
+    return " ".join(w for w in _WORD.findall(goal.lower()) if w not in _FILLER)
+
+
+class SemanticPlanCache:
+    """Plans keyed by goal similarity, checked before the planner calls the model
+
+    A cached plan is only reused when the call context (input files, target
+    columns, ...) and the planner's system prompt are identical, so a hit
+    never points at a different dataset or at tools that no longer exist.
+    Without sentence-transformers, goals match only when their normalized
+    text is equal.
+    """
+
+    def __init__(self, sandbox_root, threshold: float = SIMILARITY_THRESHOLD,
+                 model_name: str = "all-MiniLM-L6-v2"):
+        self.path = Path(sandbox_root) / "cache" / "semantic_plans.json"
+        self.threshold = threshold
+        self.model_name = model_name
+        self._model = None
+        self._entries: Optional[List[Dict[str, Any]]] = None
+        # one planner may be shared by several threads
+        self._lock = threading.Lock()
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._entries = []
+        return self._entries
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        """Unit-length embedding of text, or None when no embedding model is available"""
+        if SentenceTransformer is None:
+            return None
+        if self._model is None:
+            try:
+                self._model = SentenceTransformer(self.model_name)
+            except Exception as e:
+                print(f"[planner] Semantic cache embeddings disabled: {e}")
+                self._model = False
+        if self._model is False:
+            return None
+        return self._model.encode(text, normalize_embeddings=True).tolist()
+
+    def lookup(self, goal: str, context: str, system_sha256: str) -> Optional[Dict[str, Any]]:
+        """A copy of the plan data cached for an equivalent goal in the same context, if any"""
+        with self._lock:
+            # entries are replaced, never changed in place, so the matches stay valid
+            candidates = [e for e in self._load()
+                          if e["context"] == context and e["system_sha256"] == system_sha256]
+        if not candidates:
+            return None
+
+        key = normalize_goal(goal)
+        for entry in candidates:
+            if entry["key"] == key:
+                return copy.deepcopy(entry["plan"])
+
+        embedded = [e for e in candidates if e.get("embedding")]
+        if not embedded:
+            return None
+        query = self._embed(key)
+        if query is None:
+            return None
+        # embeddings are unit length, so the dot product is the cosine similarity
+        score, best = max(((sum(map(mul, query, e["embedding"])), e) for e in embedded),
+                          key=lambda pair: pair[0])
+        return copy.deepcopy(best["plan"]) if score >= self.threshold else None
+
+    def add(self, goal: str, context: str, system_sha256: str, plan: Dict[str, Any]):
+        """Remember the plan generated for goal, replacing any earlier plan for the same goal"""
+        key = normalize_goal(goal)
+        entry = {
+            "key": key,
+            "context": context,
+            "system_sha256": system_sha256,
+            "embedding": self._embed(key),
+            # callers go on to modify their plan data
+            "plan": copy.deepcopy(plan),
+        }
+        with self._lock:
+            entries = self._load()
+            entries[:] = [e for e in entries
+                          if (e["key"], e["context"], e["system_sha256"]) != (key, context, system_sha256)]
+            entries.append(entry)
+            del entries[:-MAX_ENTRIES]
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.write_text(json.dumps(entries), encoding="utf-8")
+            except OSError as e:
+                print(f"[planner] Failed to write semantic cache {self.path}: {e}")
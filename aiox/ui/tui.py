@@ -1,8 +1,10 @@
 # ui/tui.py
 from __future__ import annotations
-import curses, json, io, sys, time, traceback
+import contextlib, curses, heapq, json, io, os, re, sys, time, traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, List, Tuple
 from ..kernel.runtime import run_bytecode
 from ..kernel.packaging import make_aiox
 from ..kernel.replay import replay_aiox
@@ -10,6 +12,29 @@ from ..kernel.undo import undo_last_run
 from ..kernel.meters import CarbonCostMeter
 
 BORDER = 1
+# the SYSLOG panel keeps this many summarized tx.jsonl lines
+LOG_TAIL_LINES = 100
+# on first read (or after truncation) only this much of tx.jsonl's end is scanned
+LOG_TAIL_BYTES = 256 * 1024
+# the OUT panel lists this many files from sandbox/out
+OUT_LIST_FILES = 10
+# while an action runs, keys are polled this often (ms) to animate the spinner
+BUSY_POLL_MS = 50
+SPINNER = "|/-\\"
+
+# boxed panels in drawing order, with their titles; header and footer are drawn on stdscr
+PANEL_TITLES = {
+    "plan": " PLAN (APL) [1] ",
+    "bc": " BYTECODE [2] ",
+    "preview": " PREVIEW / OUTPUT [3] ",
+    "policy": " METERS & QUOTAS [4] ",
+    "logs": " SYSLOG [5] ",
+}
+ALL_PARTS = frozenset(PANEL_TITLES) | {"header", "footer"}
+# panels whose renderer overwrites its previous frame itself, so they are not erased first
+SELF_CLEARING = frozenset(("logs",))
+# everything a run can change: bytecode (recompile), out/, meters, tx log
+RUN_PARTS = ALL_PARTS - {"plan"}
 
 def read_text(p: Path, fallback: str = "") -> str:
     try:
@@ -23,6 +48,81 @@ def read_json(p: Path, default=None):
     except Exception:
         return default
 
+def _report_head(p: Path) -> List[str]:
+    return read_text(p).splitlines()[:8]
+
+def _bc_lines(p: Path) -> List[str]:
+    # bytecode listing as shown in the BYTECODE panel
+    prog = (read_json(p, {}) or {}).get("program", [])
+    return [f"{i:02d} {ins[0]} {ins[1:]}" for i, ins in enumerate(prog)]
+
+def _plan_step_lines(p: Path) -> List[str]:
+    # one "NN. OP - description" line per plan step
+    lines = []
+    for i, s in enumerate((read_json(p, {}) or {}).get("steps", [])):
+        op = s.get('op', '?')
+        desc = s.get('description', '')
+        if desc and len(desc) > 20:
+            desc = desc[:17] + "..."
+        line = f"{i+1:02d}. {op}"
+        if desc:
+            line += f" - {desc}"
+        lines.append(line)
+    return lines
+
+# tx ops shown as key=value summaries; any other record is shown raw
+SUMMARY_OPS = frozenset(("READ_CSV","WRITE_FILE","WRITE_JSON","ZIP","VERIFY_ZIP","ASSERT_GE","RUN_START","RUN_END","MAKE_DIR","VERIFY_CLI","WRITE_CHECKSUMS"))
+# a line naming none of them cannot be summarized, so it is never parsed
+_SUMMARY_OP_NAMES = re.compile("|".join(sorted(SUMMARY_OPS)))
+
+def _kv_truncate(d: Dict[str, Any], budget: int) -> str:
+    # ", ".join(f"{k}={v}" ...)[:budget], without formatting pairs that would be cut off
+    parts: List[str] = []
+    size = -2  # no separator before the first pair
+    for k, v in d.items():
+        part = f"{k}={v}"
+        parts.append(part)
+        size += len(part) + 2
+        if size >= budget:
+            break
+    return ", ".join(parts)[:budget]
+
+def _mtime_ns(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _path_key(rel: str) -> List[str]:
+    # same order as sorting Path objects: component by component
+    return rel.split(os.sep)
+
+def _tx_summary(line: str) -> str:
+    # one tx.jsonl record as shown in the SYSLOG panel
+    if not _SUMMARY_OP_NAMES.search(line):
+        return line
+    try:
+        rec = json.loads(line)
+        if rec.get("op","") in SUMMARY_OPS:
+            return " ".join([f"{k}={v}" for k,v in rec.items() if k not in ("ts","dry_run","run_id")])
+        return line
+    except Exception:
+        return line
+
+class _LastLine(io.TextIOBase):
+    """Stands in for stdout/stderr while an action runs; keeps its latest line for the footer"""
+    def __init__(self):
+        self.last = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        lines = [ln.strip() for ln in s.splitlines() if ln.strip()]
+        if lines:
+            self.last = lines[-1]
+        return len(s)
+
 class ActivityUI:
     def __init__(self, stdscr, root: Path):
         self.stdscr = stdscr
@@ -36,6 +136,36 @@ class ActivityUI:
         self.selected_panel = 0  # 0=Plan, 1=Bytecode, 2=Preview/Out, 3=Meters/Quota, 4=Logs
         self.show_plan_dag = False  # Toggle for plan DAG visualization
         self.meter = CarbonCostMeter(self.sbx)
+        # panel windows are rebuilt only when the terminal size changes
+        self._size = None
+        self._wins = {}
+        self._renderers = {
+            "plan": self._render_plan,
+            "bc": self._render_bc,
+            "preview": self._render_preview,
+            "policy": self._render_policy,
+            "logs": self._render_logs,
+        }
+        # parts of the screen to repaint on the next redraw()
+        self._dirty = set(ALL_PARTS)
+        # (path, loader) -> ((mtime_ns, size), loaded content) for files shown in panels
+        self._file_cache: Dict[Tuple[Path, Callable], Tuple[Tuple[int, int], Any]] = {}
+        # tx.jsonl tail: (inode, bytes consumed) and the summarized last lines
+        self._log_ino = None
+        self._log_pos = 0
+        self._log_tail: deque = deque(maxlen=LOG_TAIL_LINES)
+        # the logs window and the padded rows currently drawn in it
+        self._log_win = None
+        self._log_rows: List[str] = []
+        # sandbox/out listing: mtime_ns of every directory scanned, and the files shown
+        self._out_scan = None
+        # actions that run tools or the planner go to one worker so the UI keeps
+        # drawing; _job is (future, parts to repaint when it finishes)
+        self._worker = ThreadPoolExecutor(max_workers=1)
+        self._job = None
+        self._busy = ""
+        self._output = _LastLine()
+        self._frame = 0
         curses.curs_set(0)
         self.stdscr.nodelay(False)
         self.stdscr.keypad(True)
@@ -43,15 +173,90 @@ class ActivityUI:
     # --------------- draw ---------------
 
     def draw(self):
-        self.stdscr.erase()
+        """Repaint the whole screen, including what the terminal itself shows ([Ctrl-L])"""
+        self.stdscr.clearok(True)
+        self._dirty.update(ALL_PARTS)
+        self.redraw()
+
+    def mark(self, *parts: str):
+        """Queue parts of the screen for the next redraw()"""
+        self._dirty.update(parts)
+
+    def _submit(self, label: str, work: Callable[[], str], parts):
+        """Run work() on the worker; its return value becomes the status once it is done"""
+        if self._job is not None:
+            return  # one action at a time; the spinner shows what is running
+        self._busy = label
+        self._output = _LastLine()
+        self._job = (self._worker.submit(self._captured, work, self._output), parts)
+        self.stdscr.timeout(BUSY_POLL_MS)
+
+    @staticmethod
+    def _captured(work: Callable[[], str], out: _LastLine) -> str:
+        # the VM, compiler and planner print progress; on the terminal it would
+        # land wherever curses last left the cursor
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            return work()
+
+    def _poll_job(self):
+        if self._job is None:
+            return
+        future, parts = self._job
+        if future.done():
+            self._job = None
+            self.stdscr.timeout(-1)
+            try:
+                self.status = future.result()
+            except Exception as e:
+                self.status = f"{self._busy} ERROR: {e}"
+            self.mark(*parts)
+        else:
+            self._frame += 1
+            self.status = f"{SPINNER[self._frame % len(SPINNER)]} {self._busy}"
+            if self._output.last:
+                self.status += f"  {self._output.last}"
+            self.mark("footer")
+
+    def redraw(self):
+        """Repaint only the dirty parts, with one terminal update"""
         h, w = self.stdscr.getmaxyx()
 
         # Ensure minimum terminal size
         if h < 20 or w < 60:
+            self._size = None
+            self.stdscr.erase()
             self.stdscr.addstr(h//2, w//2 - 10, "Terminal too small!")
             self.stdscr.refresh()
             return
 
+        if (h, w) != self._size:
+            if not self._layout(h, w):
+                return
+            self._dirty.update(ALL_PARTS)
+
+        dirty, self._dirty = self._dirty, set()
+        for name, title in PANEL_TITLES.items():
+            if name in dirty:
+                win = self._wins[name]
+                if name not in SELF_CLEARING:
+                    win.erase()
+                self._box(win, title)
+                self._renderers[name](win)
+                win.noutrefresh()
+
+        if "header" in dirty:
+            self._draw_header(w)
+        if "footer" in dirty:
+            self._draw_footer(h, w)
+
+        self.stdscr.noutrefresh()
+        curses.doupdate()
+
+    def _layout(self, h: int, w: int) -> bool:
+        """(Re)create the panel windows for an h x w terminal"""
+        self.stdscr.erase()
+        self._size = None
+
         # layout - 5 panels now (plan left, 4 right)
         left_w = max(38, int(w * 0.36))
         right_w = w - left_w - 3  # more buffer
@@ -63,44 +268,35 @@ class ActivityUI:
 
         # Safe panel creation with bounds checking
         try:
-            plan_win = self.stdscr.subwin(h - 3, left_w, 1, 1)
+            wins = {"plan": self.stdscr.subwin(h - 3, left_w, 1, 1)}
 
             y_offset = 1
-            bc_win = self.stdscr.subwin(panel_h, right_w, y_offset, left_w + 3)
+            wins["bc"] = self.stdscr.subwin(panel_h, right_w, y_offset, left_w + 3)
 
             y_offset += panel_h + 1
-            prev_win = self.stdscr.subwin(panel_h, right_w, y_offset, left_w + 3)
+            wins["preview"] = self.stdscr.subwin(panel_h, right_w, y_offset, left_w + 3)
 
             y_offset += panel_h + 1
-            policy_win = self.stdscr.subwin(panel_h, right_w, y_offset, left_w + 3)
+            wins["policy"] = self.stdscr.subwin(panel_h, right_w, y_offset, left_w + 3)
 
             y_offset += panel_h + 1
             remaining_h = h - y_offset - 2
-            logs_win = self.stdscr.subwin(max(3, remaining_h), right_w, y_offset, left_w + 3)
+            wins["logs"] = self.stdscr.subwin(max(3, remaining_h), right_w, y_offset, left_w + 3)
         except Exception:
             # Fallback to simple layout
             self.stdscr.addstr(h//2, w//2 - 15, "Layout error - terminal too small")
             self.stdscr.refresh()
-            return
-
-        # titles
-        self._box(plan_win, " PLAN (APL) [1] ")
-        self._box(bc_win,   " BYTECODE [2] ")
-        self._box(prev_win, " PREVIEW / OUTPUT [3] ")
-        self._box(policy_win, " METERS & QUOTAS [4] ")
-        self._box(logs_win, " SYSLOG [5] ")
+            return False
 
-        # content
-        self._render_plan(plan_win)
-        self._render_bc(bc_win)
-        self._render_preview(prev_win)
-        self._render_policy(policy_win)
-        self._render_logs(logs_win)
+        self._wins = wins
+        self._size = (h, w)
+        return True
 
+    def _draw_header(self, w: int):
         # Prominent header with carbon footprint and cost tracking
+        self.stdscr.move(0, 0)
+        self.stdscr.clrtoeol()
         current_stats = self.meter.get_current_run_stats()
-        historical = self.meter.get_historical_stats()
-        totals = historical.get("totals", {})
 
         if current_stats["status"] == "active_run":
             # Active run - show current metrics prominently
@@ -115,14 +311,13 @@ class ActivityUI:
 
             # Use reverse video for active run to make it stand out
             try:
-                self.stdscr.attron(curses.A_REVERSE)
                 header_display = (main_header + metrics).center(w-2)[:w-2]
-                self.stdscr.addstr(0, 1, header_display)
-                self.stdscr.attroff(curses.A_REVERSE)
+                self.stdscr.addstr(0, 1, header_display, curses.A_REVERSE)
             except curses.error:
                 pass
         else:
             # No active run - show historical totals
+            totals = self.meter.get_historical_stats().get("totals", {})
             total_co2 = totals.get('total_co2_grams', 0)
             total_cost = totals.get('total_cost_usd', 0)
             total_runs = totals.get('runs_analyzed', 0)
@@ -143,12 +338,12 @@ class ActivityUI:
                     except curses.error:
                         pass
 
-        # footer
+    def _draw_footer(self, h: int, w: int):
         footer = "[g]enerate plan [v]iew DAG [d]ry-run [e]xecute [p]ack [r]eplay [u]ndo [c]ost analysis [q]uit"
+        self.stdscr.move(h-1, 0)
+        self.stdscr.clrtoeol()
         self.stdscr.addstr(h-1, 1, (self.status + "  " + footer)[:w-2])
 
-        self.stdscr.refresh()
-
     def _box(self, win, title: str):
         win.box()
         try:
@@ -158,15 +353,61 @@ class ActivityUI:
 
     # --------------- data providers ---------------
 
+    def _cached(self, p: Path, load: Callable[[Path], Any], default=None):
+        """load(p), reused until the file's mtime or size changes"""
+        try:
+            st = p.stat()
+        except OSError:
+            self._file_cache.pop((p, load), None)
+            return default
+        key = (st.st_mtime_ns, st.st_size)
+        hit = self._file_cache.get((p, load))
+        if hit is not None and hit[0] == key:
+            return hit[1]
+        value = load(p)
+        self._file_cache[(p, load)] = (key, value)
+        return value
+
+    def _out_files(self) -> List[str]:
+        """First OUT_LIST_FILES files under sandbox/out, relative to the sandbox
+
+        Adding or removing an entry changes its directory's mtime, so the
+        listing is only rescanned when one of the scanned directories changed.
+        """
+        if self._out_scan is not None:
+            dirs, files = self._out_scan
+            if all(_mtime_ns(d) == m for d, m in dirs.items()):
+                return files
+        base = len(str(self.sbx)) + 1
+        dirs: Dict[str, Any] = {}
+        found: List[str] = []
+        stack = [str(self.sbx / "out")]
+        while stack:
+            d = stack.pop()
+            # stat before listing: a change made during the scan forces the next rescan
+            dirs[d] = _mtime_ns(d)
+            try:
+                with os.scandir(d) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            found.append(entry.path[base:])
+            except OSError:
+                continue
+        files = heapq.nsmallest(OUT_LIST_FILES, found, key=_path_key)
+        self._out_scan = (dirs, files)
+        return files
+
     def _render_plan(self, win):
-        plan = read_json(self.plan_path, {})
+        plan = self._cached(self.plan_path, read_json, {}) or {}
         y, x = 1, 2
+        max_h, max_w = win.getmaxyx()
+        inner_w = max_w - 4
         def add(line: str = "", bold=False):
             nonlocal y
             try:
-                if bold: win.attron(curses.A_BOLD)
-                win.addstr(y, x, line[:win.getmaxyx()[1]-4])
-                if bold: win.attroff(curses.A_BOLD)
+                win.addstr(y, x, line[:inner_w], curses.A_BOLD if bold else 0)
             except curses.error:
                 pass
             y += 1
@@ -209,20 +450,13 @@ class ActivityUI:
                 add("Caps: <none>")
             add()
 
-            steps = plan.get("steps", [])
-            add(f"Steps: {len(steps)}", bold=True)
-            for i, s in enumerate(steps[:win.getmaxyx()[0]-12]):
-                op = s.get('op', '?')
-                desc = s.get('description', '')
-                if desc and len(desc) > 20:
-                    desc = desc[:17] + "..."
-                line = f"{i+1:02d}. {op}"
-                if desc:
-                    line += f" - {desc}"
+            step_lines = self._cached(self.plan_path, _plan_step_lines, [])
+            add(f"Steps: {len(step_lines)}", bold=True)
+            for line in step_lines[:max_h-12]:
                 add(line)
 
             # Show generation info if from LLM
-            if planner_type == "llm" and y < win.getmaxyx()[0] - 3:
+            if planner_type == "llm" and y < max_h - 3:
                 add()
                 generated_at = plan.get("_generated_at", "")
                 if generated_at:
@@ -230,7 +464,7 @@ class ActivityUI:
                     add(f"Generated: {date_part}")
 
             # Show toggle hint
-            if y < win.getmaxyx()[0] - 2:
+            if y < max_h - 2:
                 y += 1
                 add("[v] Toggle DAG view", bold=False)
 
@@ -239,16 +473,15 @@ class ActivityUI:
         y = start_y
         x = start_x
         max_h, max_w = win.getmaxyx()
+        line_budget = max_w - start_x - 2
 
         def add_dag_line(line: str = "", bold=False, indent=0):
             nonlocal y
             if y >= max_h - 1:
                 return
             try:
-                if bold: win.attron(curses.A_BOLD)
-                display_line = line[:max_w - start_x - 2]
-                win.addstr(y, x + indent, display_line)
-                if bold: win.attroff(curses.A_BOLD)
+                display_line = line[:line_budget]
+                win.addstr(y, x + indent, display_line, curses.A_BOLD if bold else 0)
             except curses.error:
                 pass
             y += 1
@@ -306,13 +539,13 @@ class ActivityUI:
                 if isinstance(step_in, str):
                     add_dag_line(f"   |  in: {step_in}", indent=0)
                 elif isinstance(step_in, dict) and step_in:
-                    in_str = ", ".join(f"{k}={v}" for k, v in step_in.items())[:max_w - x - 15]
+                    in_str = _kv_truncate(step_in, max_w - x - 15)
                     add_dag_line(f"   |  in: {in_str}", indent=0)
 
                 if isinstance(step_out, str):
                     add_dag_line(f"   |  out: {step_out}", indent=0)
                 elif isinstance(step_out, dict) and step_out:
-                    out_str = ", ".join(f"{k}={v}" for k, v in step_out.items())[:max_w - x - 15]
+                    out_str = _kv_truncate(step_out, max_w - x - 15)
                     add_dag_line(f"   |  out: {out_str}", indent=0)
 
             # Add connection line between steps
@@ -325,17 +558,17 @@ class ActivityUI:
             add_dag_line("[v] Toggle to list view")
 
     def _render_bc(self, win):
-        bc = read_json(self.bc_path, {})
-        prog = bc.get("program", [])
+        lines = self._cached(self.bc_path, _bc_lines, [])
         y, x = 1, 2
+        max_h, max_w = win.getmaxyx()
+        inner_w = max_w - 4
         try:
             win.addstr(y, x, f"File: {self._rel(self.bc_path)}", curses.A_BOLD); y += 1
         except curses.error:
             pass
-        for i, ins in enumerate(prog[:win.getmaxyx()[0]-3]):
-            line = f"{i:02d} {ins[0]} {ins[1:]}"
+        for line in lines[:max_h-3]:
             try:
-                win.addstr(y, x, line[:win.getmaxyx()[1]-4])
+                win.addstr(y, x, line[:inner_w])
             except curses.error:
                 pass
             y += 1
@@ -348,19 +581,18 @@ class ActivityUI:
             win.addstr(y, x, f"Sandbox out: {self._rel(out_dir)}", curses.A_BOLD); y += 1
         except curses.error:
             pass
-        files = sorted([p.relative_to(self.sbx) for p in out_dir.rglob("*") if p.is_file()]) if out_dir.exists() else []
+        files = self._out_files()
         if not files:
             self._add_line(win, y, x, "(no artifacts yet — run [d] or [e])"); y += 1
         else:
-            for p in files[:10]:
+            for p in files:
                 self._add_line(win, y, x, f"• {p}"); y += 1
         # preview report head
         rpt = out_dir / "report.md"
         if rpt.exists():
             y += 1
             self._add_line(win, y, x, "report.md (head):", bold=True); y += 1
-            head = "\n".join(read_text(rpt).splitlines()[:8])
-            for line in head.splitlines():
+            for line in self._cached(rpt, _report_head, []):
                 self._add_line(win, y, x, line); y += 1
 
     def _render_policy(self, win):
@@ -373,11 +605,8 @@ class ActivityUI:
             if y >= max_h - 1:
                 return
             try:
-                if highlight: win.attron(curses.A_REVERSE)
-                elif bold: win.attron(curses.A_BOLD)
-                win.addstr(y, x, line[:max_w-4])
-                if highlight: win.attroff(curses.A_REVERSE)
-                elif bold: win.attroff(curses.A_BOLD)
+                attr = curses.A_REVERSE if highlight else curses.A_BOLD if bold else 0
+                win.addstr(y, x, line[:max_w-4], attr)
             except curses.error:
                 pass
             y += 1
@@ -464,34 +693,59 @@ class ActivityUI:
             add("🎬 READY FOR DEMO", bold=True)
             add("Press [g] to generate plan or [e] to execute")
 
-    def _render_logs(self, win):
-        # show last ~100 lines from tx.jsonl (compact)
+    def _tx_tail(self) -> List[str]:
+        """Summaries of the last tx.jsonl lines, reading only what was appended since last time"""
         tx = self.sbx / "logs" / "tx.jsonl"
-        lines: List[str] = []
-        if tx.exists():
-            for line in tx.read_text(encoding="utf-8").splitlines()[-100:]:
-                try:
-                    rec = json.loads(line)
-                    op = rec.get("op","")
-                    msg = ""
-                    if op in ("READ_CSV","WRITE_FILE","WRITE_JSON","ZIP","VERIFY_ZIP","ASSERT_GE","RUN_START","RUN_END","MAKE_DIR","VERIFY_CLI","WRITE_CHECKSUMS"):
-                        msg = " ".join([f"{k}={v}" for k,v in rec.items() if k not in ("ts","dry_run","run_id")])
-                    else:
-                        msg = line
-                    lines.append(msg)
-                except Exception:
-                    lines.append(line)
+        try:
+            st = tx.stat()
+        except OSError:
+            self._log_ino = None
+            return ["(no transactions yet)"]
+        if st.st_ino != self._log_ino or st.st_size < self._log_pos:
+            # new or truncated log: start over from its last LOG_TAIL_BYTES
+            self._log_ino = st.st_ino
+            self._log_pos = max(0, st.st_size - LOG_TAIL_BYTES)
+            self._log_tail.clear()
+            skip_partial = self._log_pos > 0
+        elif st.st_size == self._log_pos:
+            return list(self._log_tail)
         else:
-            lines.append("(no transactions yet)")
-        y, x = 1, 2
-        for ln in lines[-(win.getmaxyx()[0]-2):]:
-            self._add_line(win, y, x, ln[:win.getmaxyx()[1]-4]); y += 1
+            skip_partial = False
+
+        with tx.open("rb") as f:
+            f.seek(self._log_pos)
+            data = f.read(st.st_size - self._log_pos)
+        if skip_partial:
+            # the scan started mid-line; drop that fragment
+            data = data[data.find(b"\n") + 1:] if b"\n" in data else b""
+            self._log_pos = st.st_size - len(data)
+        # leave an unterminated last line for the next read
+        end = data.rfind(b"\n") + 1
+        self._log_pos += end
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            self._log_tail.append(_tx_summary(line))
+        return list(self._log_tail)
+
+    def _render_logs(self, win):
+        # show last ~100 lines from tx.jsonl (compact)
+        lines = self._tx_tail()
+        x = 2
+        max_h, max_w = win.getmaxyx()
+        inner_w = max_w - 4
+        # rows are padded to the panel width, so writing one replaces whatever it showed
+        rows = [ln[:inner_w].ljust(inner_w) for ln in lines[-(max_h-2):]]
+        rows += [" " * inner_w] * (max_h - 2 - len(rows))
+        # a new window (after a resize) starts blank and gets every row
+        shown = self._log_rows if win is self._log_win else ()
+        for i, row in enumerate(rows):
+            if i < len(shown) and shown[i] == row:
+                continue
+            self._add_line(win, 1 + i, x, row)
+        self._log_win, self._log_rows = win, rows
 
     def _add_line(self, win, y, x, s: str, bold=False):
         try:
-            if bold: win.attron(curses.A_BOLD)
-            win.addstr(y, x, s)
-            if bold: win.attroff(curses.A_BOLD)
+            win.addstr(y, x, s, curses.A_BOLD if bold else 0)
         except curses.error:
             pass
 
@@ -515,8 +769,7 @@ class ActivityUI:
         )
 
         if needs_compile:
-            self.status = "Compiling plan to bytecode..."
-            self.draw(); self.stdscr.refresh()
+            self._busy = "Compiling plan to bytecode..."
             try:
                 from ..compiler.compile_bc import compile_plan_file
                 compile_plan_file(
@@ -528,56 +781,60 @@ class ActivityUI:
             except Exception as e:
                 raise Exception(f"Compilation failed: {e}")
 
+    # actions that touch the sandbox run on the worker via _submit, and return
+    # their final status line
+
     def action_dryrun(self):
-        self.status = "Dry-run in progress…"
-        self.draw(); self.stdscr.refresh()
+        self._submit("Dry-run in progress…", self._do_dryrun, RUN_PARTS)
+
+    def _do_dryrun(self) -> str:
         try:
             self._ensure_bytecode()
             run_bytecode(self.bc_path, self.sbx, dry_run=True, auto_yes=True)
-            self.status = "Dry-run completed."
+            return "Dry-run completed."
         except Exception as e:
-            self.status = f"Dry-run ERROR: {e}"
-        self.draw()
+            return f"Dry-run ERROR: {e}"
 
     def action_execute(self):
-        self.status = "Execute in progress…"
-        self.draw()
+        self._submit("Execute in progress…", self._do_execute, RUN_PARTS)
+
+    def _do_execute(self) -> str:
         try:
             self._ensure_bytecode()
             run_bytecode(self.bc_path, self.sbx, dry_run=False, auto_yes=True)
-            self.status = "Execute completed."
+            return "Execute completed."
         except Exception as e:
-            self.status = f"Execute ERROR: {e}"
-        self.draw()
+            return f"Execute ERROR: {e}"
 
     def action_pack(self):
-        self.status = "Packing…"
-        self.draw()
+        self._submit("Packing…", self._do_pack, ("bc", "logs", "footer"))
+
+    def _do_pack(self) -> str:
         try:
             self._ensure_bytecode()
             make_aiox(self.plan_path, self.bc_path, self.sbx, self.pkg_path, name="forge")
-            self.status = f"Packed → {self._rel(self.pkg_path)}"
+            return f"Packed → {self._rel(self.pkg_path)}"
         except Exception as e:
-            self.status = f"Pack ERROR: {e}"
-        self.draw()
+            return f"Pack ERROR: {e}"
 
     def action_replay(self):
         if not self.pkg_path.exists():
             self.status = "Replay ERROR: package not found (run [p] first)."
-            self.draw(); return
-        self.status = "Replaying…"
-        self.draw()
+            self.mark("footer"); return
+        self._submit("Replaying…", self._do_replay, RUN_PARTS)
+
+    def _do_replay(self) -> str:
         ok, diffs = replay_aiox(self.pkg_path, self.sbx, auto_yes=True, clean_out=True)
         if ok:
-            self.status = "Deterministic replay PASSED."
-        else:
-            self.status = f"Replay FAILED: {len(diffs)} diffs (see logs)."
-        self.draw()
+            return "Deterministic replay PASSED."
+        return f"Replay FAILED: {len(diffs)} diffs (see logs)."
 
     def action_undo(self):
+        self._submit("Undoing last run…", self._do_undo, RUN_PARTS)
+
+    def _do_undo(self) -> str:
         n = undo_last_run(self.sbx)
-        self.status = f"Undo removed {n} paths (if any)."
-        self.draw()
+        return f"Undo removed {n} paths (if any)."
 
     def action_open_report(self):
         rpt = self.sbx / "out" / "report.md"
@@ -585,13 +842,13 @@ class ActivityUI:
             self.status = f"Opened: {self._rel(rpt)}"
         else:
             self.status = "No report yet."
-        self.draw()
+        self.mark("footer")
 
     def action_toggle_dag(self):
         self.show_plan_dag = not self.show_plan_dag
         view_type = "DAG" if self.show_plan_dag else "list"
         self.status = f"Plan view switched to {view_type}"
-        self.draw()
+        self.mark("plan", "footer")
 
     def action_cost_analysis(self):
         """Show cost analysis and pruning suggestions"""
@@ -613,12 +870,14 @@ class ActivityUI:
 
         except Exception as e:
             self.status = f"Cost analysis error: {e}"
-        self.draw()
+        self.mark("footer")
 
     def action_generate_plan(self):
+        # a new plan also means new meters and log entries
+        self._submit("Generating plan with LLM...", self._do_generate_plan, ALL_PARTS)
+
+    def _do_generate_plan(self) -> str:
         """Generate a new plan using LLM planner with dynamic input detection"""
-        self.status = "Generating plan with LLM..."
-        self.draw()
         try:
             from ..kernel.tools import ToolRegistry
             from ..planner.core import PlanGenerator
@@ -661,10 +920,12 @@ class ActivityUI:
                 else:
                     goal = f"Analyze {primary_input} dataset and generate comprehensive insights report"
 
-                execution_plan = planner.generate_plan(goal=goal, input_csv=primary_input)
+                # [g] asks for a new plan, so never reuse one cached for an equivalent goal
+                execution_plan = planner.generate_plan(goal=goal, input_csv=primary_input,
+                                                       use_semantic_cache=False)
             else:
                 goal = "Analyze available data and generate insights report"
-                execution_plan = planner.generate_plan(goal=goal)
+                execution_plan = planner.generate_plan(goal=goal, use_semantic_cache=False)
 
             # Convert to APL and save
             apl_data = converter.convert_to_apl(execution_plan)
@@ -675,18 +936,20 @@ class ActivityUI:
 
             planner_type = execution_plan.metadata.get('planner_type', 'unknown')
             input_info = f" ({primary_input})" if primary_input else " (no input files)"
-            self.status = f"Plan generated ({planner_type}) - {len(execution_plan.steps)} steps{input_info}"
+            return f"Plan generated ({planner_type}) - {len(execution_plan.steps)} steps{input_info}"
 
         except Exception as e:
-            self.status = f"Generate error: {str(e)[:50]}..."
-        self.draw()
+            return f"Generate error: {str(e)[:50]}..."
 
     # --------------- event loop ---------------
 
     def loop(self):
         while True:
-            self.draw()
+            self._poll_job()
+            self.redraw()
             ch = self.stdscr.getch()
+            if ch == -1:
+                continue  # poll timeout while an action runs
             if ch in (ord('q'), 27):  # q or ESC
                 break
             elif ch == ord('g'):
@@ -709,8 +972,13 @@ class ActivityUI:
                 self.action_open_report()
             elif ch in (ord('1'), ord('2'), ord('3'), ord('4')):
                 self.selected_panel = int(chr(ch)) - 1
+            elif ch == 12:  # Ctrl-L
+                self.draw()
+            elif ch == curses.KEY_RESIZE:
+                pass  # redraw() notices the new size and rebuilds the layout
             else:
                 self.status = "Keys: [g]enerate [v]iew DAG [c]ost analysis [d]ry-run [e]xecute [p]ack [r]eplay [u]ndo [q]uit"
+                self.mark("footer")
 
 def main(root: Path):
     def _wrap(stdscr):
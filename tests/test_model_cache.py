@@ -0,0 +1,23 @@
+"""Background writes in ModelCallCache"""
+
+import json
+
+from aiox.kernel.replay_gate import ReplayGate
+
+
+def test_record_waits_for_background_writes(tmp_path):
+    gate = ReplayGate(tmp_path)
+    for i in range(20):
+        gate.cache.store_result_later("m", {"prompt": i}, {"response_text": str(i)}, 1.0,
+                                      {"input": 1, "output": 1})
+
+    assert gate.record_successful_run() == "Recorded 10 model calls for replay verification"
+    log = json.loads((tmp_path / "logs" / "last_run_model_calls.json").read_text(encoding="utf-8"))
+    # the last ten writes, in call order
+    assert [c["inputs"]["prompt"] for c in log["model_calls"]] == list(range(10, 20))
+
+
+def test_lookup_waits_for_background_write(tmp_path):
+    gate = ReplayGate(tmp_path)
+    gate.cache.store_result_later("m", {"prompt": "x"}, {"response_text": "y"}, 1.0)
+    assert gate.cache.get_cached_result("m", {"prompt": "x"}) == {"response_text": "y"}
@@ -0,0 +1,38 @@
+"""Replay verification in ReplayGate"""
+
+from aiox.kernel.replay_gate import ReplayGate
+
+
+def _gate(tmp_path, expected_models, actual_models):
+    gate = ReplayGate(tmp_path)
+    gate.enable_replay_mode([{"model": m, "inputs": {}} for m in expected_models])
+    gate.actual_calls = [{"model": m} for m in actual_models]
+    return gate
+
+
+def test_fail_fast_stops_at_first_issue(tmp_path):
+    gate = _gate(tmp_path, ["a", "b", "c"], ["x", "y", "c"])
+    assert gate.verify_replay_completeness() == (False, [
+        "Call 1 model mismatch: expected a, got x",
+        "Call 2 model mismatch: expected b, got y",
+    ])
+    assert gate.verify_replay_completeness(fail_fast=True) == (False, [
+        "Call 1 model mismatch: expected a, got x",
+    ])
+
+
+def test_is_replay_valid(tmp_path):
+    assert _gate(tmp_path, ["a", "b"], ["a", "b"]).is_replay_valid()
+    assert not _gate(tmp_path, ["a", "b"], ["a"]).is_replay_valid()
+    assert not _gate(tmp_path, ["a", "b"], ["a", "x"]).is_replay_valid()
+    # outside replay mode there is nothing to verify
+    assert ReplayGate(tmp_path).is_replay_valid()
+
+
+def test_non_object_run_log_is_a_miss(tmp_path):
+    log = tmp_path / "logs" / "last_run_model_calls.json"
+    log.parent.mkdir(parents=True)
+    log.write_text("[]", encoding="utf-8")
+    gate = ReplayGate(tmp_path)
+    assert gate.load_run_for_replay() is False
+    assert not gate.replay_mode
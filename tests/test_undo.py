@@ -0,0 +1,42 @@
+"""Undo of a VM run whose tx log holds a failed guard"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from aiox.kernel.runtime import run_bytecode
+from aiox.kernel.undo import undo_last_run
+
+
+def _write_program(root: Path) -> Path:
+    (root / "sandbox" / "in").mkdir(parents=True)
+    (root / "sandbox" / "in" / "data.csv").write_text("x,price\n1,2\n2,4\n3,6\n4,8\n", encoding="utf-8")
+    bc = {
+        "capabilities": ["fs.read", "fs.write"],
+        "program": [
+            ["READ_CSV", "sandbox/in/data.csv", "S0"],
+            ["PROFILE", "S0", "S1"],
+            ["EMIT_REPORT", "S1", "S1", "sandbox/out/report.md"],
+            # the profile has no r2, so the guard logs value -inf and fails
+            ["ASSERT_GE", "S1", "r2", 0.5],
+        ],
+    }
+    path = root / "bytecode.json"
+    path.write_text(json.dumps(bc), encoding="utf-8")
+    return path
+
+
+def test_undo_after_failed_assert(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bytecode = _write_program(tmp_path)
+    sandbox = (tmp_path / "sandbox").resolve()
+
+    with pytest.raises(RuntimeError, match="Guard failed"):
+        run_bytecode(bytecode, sandbox, auto_yes=True)
+    report = sandbox / "out" / "report.md"
+    assert report.exists()
+    assert b"-Infinity" in (sandbox / "logs" / "tx.jsonl").read_bytes()
+
+    assert undo_last_run(sandbox) == 1
+    assert not report.exists()